@@ -0,0 +1,93 @@
+from Board import Board
+from Tile import Tile
+
+# NumPy is only needed by this module, so the rest of the game works without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""Scores many positions at once with NumPy. A batch of N positions is encoded as two (N, 121) arrays of 0/1 with the
+tiles occupied by each player, and the per-tile score tables of calculate_tiles_scores are exported as arrays, so every
+score of the batch is computed with a few array operations. The scores are the same as Board.get_score"""
+
+NUMBER_OF_TILES: int = sum(Board.TILES_PER_ROW)
+# Bytes needed to store a mask of NUMBER_OF_TILES bits
+MASK_BYTES: int = (NUMBER_OF_TILES + 7) // 8
+WIN_SCORE: int = 1_000_000
+
+# Arrays built from a reference Board the first time they are needed
+tables: dict = None
+
+def require_numpy() -> None:
+    if np is None:
+        raise ImportError("BatchEvaluation needs NumPy (pip install numpy)")
+
+"""Returns the arrays with the score of every tile for both evaluation functions and players, and the boolean masks of the triangles"""
+def get_tables() -> dict:
+    global tables
+    require_numpy()
+    if tables is None:
+        board = Board()
+        tables = {
+            "score1_player1": np.array([tile.get_score1_for_player1() for tile in board.board_tiles], dtype=np.int64),
+            "score1_player2": np.array([tile.get_score1_for_player2() for tile in board.board_tiles], dtype=np.int64),
+            "score2_player1": np.array([tile.get_score2_for_player1() for tile in board.board_tiles], dtype=np.int64),
+            "score2_player2": np.array([tile.get_score2_for_player2() for tile in board.board_tiles], dtype=np.int64),
+            "top_triangle": np.array([tile.is_in_top_triangle for tile in board.board_tiles], dtype=bool),
+            "bottom_triangle": np.array([tile.is_in_bottom_triangle for tile in board.board_tiles], dtype=bool),
+        }
+    return tables
+
+"""Encodes positions given as (player1 mask, player2 mask) pairs, like Board.get_player_masks"""
+def encode_masks(masks: list[tuple[int, int]]):
+    require_numpy()
+    player1 = np.frombuffer(b"".join(player1_mask.to_bytes(MASK_BYTES, "little") for (player1_mask, _) in masks), dtype=np.uint8)
+    player2 = np.frombuffer(b"".join(player2_mask.to_bytes(MASK_BYTES, "little") for (_, player2_mask) in masks), dtype=np.uint8)
+    player1 = np.unpackbits(player1.reshape(len(masks), MASK_BYTES), axis=1, bitorder="little")[:, :NUMBER_OF_TILES]
+    player2 = np.unpackbits(player2.reshape(len(masks), MASK_BYTES), axis=1, bitorder="little")[:, :NUMBER_OF_TILES]
+    return player1, player2
+
+def encode_boards(boards: list[Board]):
+    return encode_masks([board.get_player_masks() for board in boards])
+
+"""Encodes the positions reached after each of the moves of the board, without making the moves"""
+def encode_children(board: Board, moves: list[tuple[Tile, Tile]]):
+    player1, player2 = encode_boards([board])
+    player1, player2 = np.repeat(player1, len(moves), axis=0), np.repeat(player2, len(moves), axis=0)
+
+    rows = np.arange(len(moves))
+    origins = np.array([tile_origin.index for (tile_origin, _) in moves], dtype=np.int64)
+    destinations = np.array([tile_destination.index for (_, tile_destination) in moves], dtype=np.int64)
+    for occupancy in [player1, player2]:
+        # Only the array of the player that owns the moved piece has the origin occupied
+        moving = occupancy[rows, origins] == 1
+        occupancy[rows[moving], origins[moving]] = 0
+        occupancy[rows[moving], destinations[moving]] = 1
+    return player1, player2
+
+"""Returns an array with the score of every position, from the point of view of the player1 if is_player1_turn or of the player2 otherwise"""
+def score_positions(player1, player2, is_player1_turn: bool, use_eval_func_1: bool):
+    t = get_tables()
+    player1, player2 = np.asarray(player1, dtype=np.int64), np.asarray(player2, dtype=np.int64)
+
+    if use_eval_func_1:
+        score_player_1, score_player_2 = player1 @ t["score1_player1"], player2 @ t["score1_player2"]
+    else:
+        score_player_1, score_player_2 = player1 @ t["score2_player1"], player2 @ t["score2_player2"]
+    scores = score_player_1 - score_player_2 if is_player1_turn else score_player_2 - score_player_1
+
+    # A player wins when its target triangle is full and at least one of its pieces is inside it
+    occupied = (player1 | player2).astype(bool)
+    player1_won = occupied[:, t["bottom_triangle"]].all(axis=1)  &  player1[:, t["bottom_triangle"]].any(axis=1)
+    player2_won = occupied[:, t["top_triangle"]].all(axis=1)  &  player2[:, t["top_triangle"]].any(axis=1)
+    won, lost = (player1_won, player2_won) if is_player1_turn else (player2_won, player1_won)
+
+    # The same priority as Board.get_score: first the win of the player, then the win of the opponent
+    scores = np.where(lost, -WIN_SCORE, scores)
+    scores = np.where(won, WIN_SCORE, scores)
+    return scores
+
+"""Returns an array with the score of the position reached after each of the moves"""
+def score_children(board: Board, moves: list[tuple[Tile, Tile]], is_player1_turn: bool, use_eval_func_1: bool):
+    return score_positions(*encode_children(board, moves), is_player1_turn, use_eval_func_1)
@@ -0,0 +1,174 @@
+from Board import Board
+
+"""Builds the tables used by the BitBoard from the tiles of a reference Board. The tiles are referred to by their index"""
+def build_tables(board: Board) -> tuple:
+    step_masks: list[int] = []
+    jumps: list[tuple[tuple[int, int, int], ...]] = []
+    for tile in board.board_tiles:
+        step_mask: int = 0
+        tile_jumps: list[tuple[int, int, int]] = []
+        for (direction, neighbour_tile) in tile.get_neighbours().items():
+            step_mask |= 1 << neighbour_tile.index
+            neighbours_neighbour = neighbour_tile.get_neighbours().get(direction, None)
+            if neighbours_neighbour is not None:
+                # (mask of the tile jumped over, mask of the landing tile, index of the landing tile)
+                landing_index: int = neighbours_neighbour.index
+                tile_jumps.append((1 << neighbour_tile.index, 1 << landing_index, landing_index))
+        step_masks.append(step_mask)
+        jumps.append(tuple(tile_jumps))
+
+    top_triangle_mask: int = sum(1 << tile.index for tile in board.get_top_triangle_tiles())
+    bottom_triangle_mask: int = sum(1 << tile.index for tile in board.get_bottom_triangle_tiles())
+
+    scores1_player1 = tuple(tile.get_score1_for_player1() for tile in board.board_tiles)
+    scores1_player2 = tuple(tile.get_score1_for_player2() for tile in board.board_tiles)
+    scores2_player1 = tuple(tile.get_score2_for_player1() for tile in board.board_tiles)
+    scores2_player2 = tuple(tile.get_score2_for_player2() for tile in board.board_tiles)
+
+    return (tuple(step_masks), tuple(jumps), top_triangle_mask, bottom_triangle_mask,
+            scores1_player1, scores1_player2, scores2_player1, scores2_player2)
+
+(STEP_MASKS, JUMPS, TOP_TRIANGLE_MASK, BOTTOM_TRIANGLE_MASK,
+ SCORES1_PLAYER1, SCORES1_PLAYER2, SCORES2_PLAYER1, SCORES2_PLAYER2) = build_tables(Board())
+
+"""Generator that outputs the index of every bit set in the mask, from the lowest to the highest"""
+def iterate_bits(mask: int):
+    while mask:
+        lowest_bit: int = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+"""Represents a position as two integers, where the bit i is set if the tile i contains a piece of that player.
+Move generation, moves and win checks only work with those integers and the precomputed tables"""
+class BitBoard():
+    def __init__(self, player1: int = 0, player2: int = 0) -> None:
+        self.player1: int = player1
+        self.player2: int = player2
+
+    """Creates the BitBoard with the same position as the Board"""
+    @classmethod
+    def from_board(cls, board: Board):
+        return cls(*board.get_player_masks())
+
+    """Places the pieces of this position in the Board (a new one if none is given) and returns it"""
+    def to_board(self, board: Board = None) -> Board:
+        board = Board() if board is None else board
+        board.set_player_masks(self.player1, self.player2)
+        return board
+
+    def copy(self):
+        return BitBoard(self.player1, self.player2)
+
+    def get_occupied(self) -> int:
+        return self.player1 | self.player2
+
+    """Returns a mask with all the tiles where the piece in the tile origin can move to (steps and chains of jumps)"""
+    def get_all_possible_tiles_to_move(self, origin: int) -> int:
+        occupied: int = self.player1 | self.player2
+        destinations: int = STEP_MASKS[origin] & ~occupied
+
+        # The origin is still occupied while exploring the jumps, like in Board.get_all_possible_tiles_to_move
+        reached: int = occupied
+        pending_of_exploring: list[int] = [origin]
+        while pending_of_exploring:
+            for (over_mask, landing_mask, landing_index) in JUMPS[pending_of_exploring.pop()]:
+                if occupied & over_mask  and  not reached & landing_mask:
+                    reached |= landing_mask
+                    destinations |= landing_mask
+                    pending_of_exploring.append(landing_index)
+
+        return destinations
+
+    """Returns a mask with all the valid moves for the piece in the tile origin"""
+    def get_all_valid_moves(self, origin: int) -> int:
+        destinations: int = self.get_all_possible_tiles_to_move(origin)
+        origin_mask: int = 1 << origin
+
+        # Moves that are not valid: move a piece that already rests in its target triangle out of that triangle
+        if self.player1 & origin_mask  and  BOTTOM_TRIANGLE_MASK & origin_mask:
+            return destinations & BOTTOM_TRIANGLE_MASK
+        if self.player2 & origin_mask  and  TOP_TRIANGLE_MASK & origin_mask:
+            return destinations & TOP_TRIANGLE_MASK
+        return destinations
+
+    """Returns a list with all the (origin, destination) moves of the player.
+    Same moves as get_all_valid_moves for every piece, with the loops inlined because this is the hot path of any search"""
+    def get_all_player_moves(self, is_player1: bool) -> list[tuple[int, int]]:
+        moves: list[tuple[int, int]] = []
+        occupied: int = self.player1 | self.player2
+        empty: int = ~occupied
+        if is_player1:
+            pieces, target_triangle_mask = self.player1, BOTTOM_TRIANGLE_MASK
+        else:
+            pieces, target_triangle_mask = self.player2, TOP_TRIANGLE_MASK
+
+        while pieces:
+            origin_mask: int = pieces & -pieces
+            pieces ^= origin_mask
+            origin: int = origin_mask.bit_length() - 1
+
+            destinations: int = STEP_MASKS[origin] & empty
+            reached: int = occupied
+            pending_of_exploring: list[int] = [origin]
+            while pending_of_exploring:
+                for (over_mask, landing_mask, landing_index) in JUMPS[pending_of_exploring.pop()]:
+                    if occupied & over_mask  and  not reached & landing_mask:
+                        reached |= landing_mask
+                        destinations |= landing_mask
+                        pending_of_exploring.append(landing_index)
+
+            if origin_mask & target_triangle_mask:
+                destinations &= target_triangle_mask
+
+            while destinations:
+                destination_mask: int = destinations & -destinations
+                destinations ^= destination_mask
+                moves.append((origin, destination_mask.bit_length() - 1))
+        return moves
+
+    """Returns the number of moves of the player, without building them"""
+    def count_player_moves(self, is_player1: bool) -> int:
+        return sum(self.get_all_valid_moves(origin).bit_count() for origin in iterate_bits(self.player1 if is_player1 else self.player2))
+
+    """Moves the piece in the tile origin to the tile destination. The same call with the arguments swapped undoes the move"""
+    def move_piece_to_tile(self, origin: int, destination: int) -> None:
+        move_mask: int = (1 << origin) | (1 << destination)
+        if self.player1 & (1 << origin):
+            self.player1 ^= move_mask
+        else:
+            self.player2 ^= move_mask
+
+    def has_player1_won(self) -> bool:
+        return (self.player1 | self.player2) & BOTTOM_TRIANGLE_MASK == BOTTOM_TRIANGLE_MASK  and  self.player1 & BOTTOM_TRIANGLE_MASK != 0
+
+    def has_player2_won(self) -> bool:
+        return (self.player1 | self.player2) & TOP_TRIANGLE_MASK == TOP_TRIANGLE_MASK  and  self.player2 & TOP_TRIANGLE_MASK != 0
+
+    def has_game_ended(self) -> bool:
+        return self.has_player2_won() or self.has_player1_won()
+
+    """Return the score for the current position, the same as Board.get_score"""
+    def get_score(self, is_player1_turn: bool, use_eval_func_1: bool) -> int:
+        if (is_player1_turn  and  self.has_player1_won())  or  (not is_player1_turn  and  self.has_player2_won()):
+            return 1_000_000
+        if (is_player1_turn  and  self.has_player2_won())  or  (not is_player1_turn  and  self.has_player1_won()):
+            return -1_000_000
+
+        scores_player1, scores_player2 = (SCORES1_PLAYER1, SCORES1_PLAYER2) if use_eval_func_1 else (SCORES2_PLAYER1, SCORES2_PLAYER2)
+        score_player_1 = sum(scores_player1[i] for i in iterate_bits(self.player1))
+        score_player_2 = sum(scores_player2[i] for i in iterate_bits(self.player2))
+        return score_player_1 - score_player_2 if is_player1_turn else score_player_2 - score_player_1
+
+    """Counts the leaves of the tree of all the moves up to the depth, with both players moving alternately"""
+    def perft(self, depth: int, is_player1_turn: bool) -> int:
+        if depth == 0:
+            return 1
+        if depth == 1:
+            return self.count_player_moves(is_player1_turn)
+
+        nodes: int = 0
+        for (origin, destination) in self.get_all_player_moves(is_player1_turn):
+            self.move_piece_to_tile(origin, destination)
+            nodes += self.perft(depth-1, not is_player1_turn)
+            self.move_piece_to_tile(destination, origin)
+        return nodes
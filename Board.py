@@ -1,8 +1,20 @@
 from Tile import Tile
 from Piece import Piece
+from BoardTopology import BoardTopology, get_topology
+import Zobrist
 
 class Board():
-    def __init__(self) -> None:
+    TILES_PER_ROW: list[int] = [1, 2, 3, 4, 13, 12, 11, 10, 9, 10, 11, 12, 13, 4, 3, 2, 1]
+    # The first and the last rows are the triangles where the players start and finish
+    TRIANGLE_ROWS: int = 4
+    NUMBER_OF_TILES: int = sum(TILES_PER_ROW)
+    # Bytes of Board.to_bytes: one bit per tile for each player
+    POSITION_BYTES: int = (2 * NUMBER_OF_TILES + 7) // 8
+
+    def __init__(self, debug: bool = False) -> None:
+        # Neighbours, triangles and scores of the tiles, calculated once and shared by all the boards
+        self.topology: BoardTopology = get_topology(Board.TILES_PER_ROW, Board.TRIANGLE_ROWS)
+
         # Create the tiles, an arrange them in a list of lists
         self.board_row_tiles: list[list[Tile]] = self.generate_board_rows()
 
@@ -12,22 +24,31 @@ class Board():
         # Generate the pieces for both players
         self.pieces: list[Piece] = self.generate_pieces()
 
-        # Generate then links between all tiles
+        # Link the tiles to the board, where they find their neighbours
         self.add_neighbouring_tiles()
 
+        self.create_move_generator_buffers()
+
         # Place the pieces of both users in the board
         self.place_pieces_in_board()
 
-        # Calculate scores for every tiles later used in evaluation function
-        self.calculate_tiles_scores()
+        # In debug mode the running totals are checked against a full recalculation every time they are used
+        self.debug: bool = debug
+
+        # Zobrist hash of the position and of its mirrored position (see Symmetry.py) and running totals of the scores and of the
+        # pieces inside each triangle (updated with every move).
+        # They are the same for all the boards in the start position, so they are only calculated for the first one
+        if self.topology.start_position_state is None  or  debug:
+            self.topology.start_position_state = (self.calculate_hash(), self.calculate_mirror_hash(), self.calculate_incremental_state())
+        self.hash: int = self.topology.start_position_state[0]
+        self.mirror_hash: int = self.topology.start_position_state[1]
+        self.set_incremental_state(self.topology.start_position_state[2])
     
     """Creates and returns a lists of Tiles that represent each row in the board"""
     def generate_board_rows(self) -> list[list[Tile]]:
-        TILES_PER_ROW: list[int] = [1, 2, 3, 4, 13, 12, 11, 10, 9, 10, 11, 12, 13, 4, 3, 2, 1]
-        board_rows: list[list[Tile]] = []
-        for i in range(len(TILES_PER_ROW)):
-            board_rows.append([Tile() for _ in range(TILES_PER_ROW[i])])
-        return board_rows
+        topology: BoardTopology = self.topology
+        return [[Tile(i, row_index, topology.in_top_triangle[i], topology.in_bottom_triangle[i], topology) for i in row]
+                for (row_index, row) in enumerate(topology.rows)]
     
     """Receives the list of rows with Tiles and outputs a list of Tiles"""
     def rows_to_board(self) -> list[Tile]:
@@ -36,49 +57,23 @@ class Board():
             board.extend(row)
         return board
 
+    """Creates the scratch buffers of the move generator, reused between calls: a tile has been reached if its mark is the current generation"""
+    def create_move_generator_buffers(self) -> None:
+        self.reached_marks: list[int] = [0] * len(self.board_tiles)
+        self.reached_generation: int = 0
+        self.pending_tiles: list[Tile] = []
+        self.pending_positions: list[int] = []
+
     """Creates 10 pieces for the player1 and another 10 pieces for the player2.
     Returns a single list with all 20 pieces"""
     def generate_pieces(self) -> list[Piece]:
         return [Piece(Piece.PLAYER1_COLOR) for _ in range(10)] + [Piece(Piece.PLAYER2_COLOR) for _ in range(10)]
     
-    """Adds all the neighbours for each tile"""
+    """Gives every tile the tiles of the board, so it finds its neighbours (linked by index in the topology) among them"""
     def add_neighbouring_tiles(self) -> None:
-        # Add edges within the row
-        for row in self.board_row_tiles:
-            for i in range(0, len(row)-1):
-                row[i].add_neighbour("R", row[i+1])
-            for i in range(1, len(row)):
-                row[i].add_neighbour("L", row[i-1])
-
-        # Add some diagonal edges (1/4)
-        for row_index in [0, 1, 2, 8, 9, 10, 11]:
-            for tile_index in range(len(self.board_row_tiles[row_index])):
-                self.board_row_tiles[row_index    ][tile_index    ].add_neighbour("DL", self.board_row_tiles[row_index+1][tile_index])
-                self.board_row_tiles[row_index    ][tile_index    ].add_neighbour("DR", self.board_row_tiles[row_index+1][tile_index+1])
-                self.board_row_tiles[row_index + 1][tile_index    ].add_neighbour("UR", self.board_row_tiles[row_index][tile_index])
-                self.board_row_tiles[row_index + 1][tile_index + 1].add_neighbour("UL", self.board_row_tiles[row_index][tile_index])
-
-        # Add more diagonal edges (2/4)
-        for row_index in [5, 6, 7, 8, 14, 15, 16]:
-            for tile_index in range(len(self.board_row_tiles[row_index])):
-                self.board_row_tiles[row_index    ][tile_index    ].add_neighbour("UL", self.board_row_tiles[row_index - 1][tile_index])
-                self.board_row_tiles[row_index    ][tile_index    ].add_neighbour("UR", self.board_row_tiles[row_index - 1][tile_index+1])
-                self.board_row_tiles[row_index - 1][tile_index    ].add_neighbour("DR", self.board_row_tiles[row_index    ][tile_index])
-                self.board_row_tiles[row_index - 1][tile_index + 1].add_neighbour("DL", self.board_row_tiles[row_index    ][tile_index])
-
-        # Add more diagonal edges (3/4)
-        for tile_index in range(len(self.board_row_tiles[3])):
-            self.board_row_tiles[3][tile_index    ].add_neighbour("DL", self.board_row_tiles[4][tile_index + 4])
-            self.board_row_tiles[3][tile_index    ].add_neighbour("DR", self.board_row_tiles[4][tile_index + 5])
-            self.board_row_tiles[4][tile_index + 4].add_neighbour("UR", self.board_row_tiles[3][tile_index])
-            self.board_row_tiles[4][tile_index + 5].add_neighbour("UL", self.board_row_tiles[3][tile_index])
-
-        # Add last diagonal edges (4/4)
-        for tile_index in range(len(self.board_row_tiles[13])):
-            self.board_row_tiles[13][tile_index    ].add_neighbour("UL", self.board_row_tiles[12][tile_index + 4])
-            self.board_row_tiles[13][tile_index    ].add_neighbour("UR", self.board_row_tiles[12][tile_index + 5])
-            self.board_row_tiles[12][tile_index + 4].add_neighbour("DR", self.board_row_tiles[13][tile_index])
-            self.board_row_tiles[12][tile_index + 5].add_neighbour("DL", self.board_row_tiles[13][tile_index])
+        tiles: list[Tile] = self.board_tiles
+        for tile in tiles:
+            tile.board_tiles = tiles
     
     """Places the 20 pieces where they should be at the start of the game"""
     def place_pieces_in_board(self) -> None:
@@ -109,11 +104,11 @@ class Board():
 
     """Check if triangle destination for player1 is filled with player1 Tiles"""
     def has_player1_reached_destination(self) -> bool:
-        return all(not tile.is_empty() for tile in self.get_bottom_triangle_tiles())  and  any(tile.get_piece().is_player1_piece() for tile in self.get_bottom_triangle_tiles())
+        return self.player1_in_bottom + self.player2_in_bottom == 10  and  self.player1_in_bottom > 0
 
     """Check if triangle destination for player2 is filled with player2 Tiles"""
     def has_player2_reached_destination(self) -> bool:
-        return all(not tile.is_empty() for tile in self.get_top_triangle_tiles())  and  any(tile.get_piece().is_player2_piece() for tile in self.get_top_triangle_tiles())
+        return self.player1_in_top + self.player2_in_top == 10  and  self.player2_in_top > 0
 
     """Check if player1 can move"""
     def can_player1_move(self) -> bool:
@@ -135,10 +130,15 @@ class Board():
 
     """Return True if (at least) one of the player has reached the end of the board"""
     def has_game_ended(self) -> bool:
+        if self.debug:
+            self.check_incremental_state()
         return self.has_player2_won() or self.has_player1_won()
 
     """Return the score for the current state of the board"""
     def get_score(self, is_player1_turn: bool, use_eval_func_1: bool) -> int:
+        if self.debug:
+            self.check_incremental_state()
+
         if (is_player1_turn  and  self.has_player1_won())  or  (not is_player1_turn  and  self.has_player2_won()):
             return 1_000_000
         if (is_player1_turn  and  self.has_player2_won())  or  (not is_player1_turn  and  self.has_player1_won()):
@@ -146,14 +146,43 @@ class Board():
          
         if use_eval_func_1:
             # Evaluation function 1
-            score_player_1 = sum(t.get_score1() for t in self.get_player1_tiles()) * (1 if is_player1_turn else -1)
-            score_player_2 = sum(t.get_score1() for t in self.get_player2_tiles()) * (-1 if is_player1_turn else 1)
+            score_player_1 = self.player1_score1 * (1 if is_player1_turn else -1)
+            score_player_2 = self.player2_score1 * (-1 if is_player1_turn else 1)
             return score_player_1 + score_player_2
         else:
             # Evaluation function 2
-            score_player_1 = sum(t.get_score2() for t in self.get_player1_tiles()) * (1 if is_player1_turn else -1)
-            score_player_2 = sum(t.get_score2() for t in self.get_player2_tiles()) * (-1 if is_player1_turn else 1)
+            score_player_1 = self.player1_score2 * (1 if is_player1_turn else -1)
+            score_player_2 = self.player2_score2 * (-1 if is_player1_turn else 1)
             return score_player_1 + score_player_2
+
+    """Calculates from scratch the values kept as running totals: the scores of both evaluation functions for
+    each player and the number of pieces of each player inside the top and the bottom triangles"""
+    def calculate_incremental_state(self) -> tuple[int, ...]:
+        return (
+            sum(t.get_score1() for t in self.get_player1_tiles()),
+            sum(t.get_score1() for t in self.get_player2_tiles()),
+            sum(t.get_score2() for t in self.get_player1_tiles()),
+            sum(t.get_score2() for t in self.get_player2_tiles()),
+            sum(1 for t in self.get_player1_tiles() if t.is_in_top_triangle),
+            sum(1 for t in self.get_player2_tiles() if t.is_in_top_triangle),
+            sum(1 for t in self.get_player1_tiles() if t.is_in_bottom_triangle),
+            sum(1 for t in self.get_player2_tiles() if t.is_in_bottom_triangle),
+        )
+
+    """Returns the values kept as running totals, in the same order as calculate_incremental_state"""
+    def get_incremental_state(self) -> tuple[int, ...]:
+        return (self.player1_score1, self.player2_score1, self.player1_score2, self.player2_score2,
+                self.player1_in_top, self.player2_in_top, self.player1_in_bottom, self.player2_in_bottom)
+
+    def set_incremental_state(self, state: tuple[int, ...]) -> None:
+        (self.player1_score1, self.player2_score1, self.player1_score2, self.player2_score2,
+         self.player1_in_top, self.player2_in_top, self.player1_in_bottom, self.player2_in_bottom) = state
+
+    """Raises an exception if the running totals do not match a full recalculation"""
+    def check_incremental_state(self) -> None:
+        expected_state, current_state = self.calculate_incremental_state(), self.get_incremental_state()
+        if expected_state != current_state:
+            raise RuntimeError(f"Running totals out of date: expected {expected_state}, found {current_state}")
     
     """Generator that outputs all the tiles where you can move to"""
     def get_all_possible_tiles_to_move(self, tile: Tile, only_jumps = False, already_jumped_from = None, already_returned = None):
@@ -167,7 +196,9 @@ class Board():
             # Add the starting tile 
             already_jumped_from.add(tile)
 
-            for (neighbour_direction, neighbour_tile) in tile.get_neighbours().items():
+            # The neighbours and the tiles behind them in the same direction, by index in the topology
+            for (neighbour_index, next_index) in self.topology.jumps[tile.index]:
+                neighbour_tile: Tile = self.board_tiles[neighbour_index]
                 if neighbour_tile.is_empty():
                     # A neighbouring tile is empty, we can move to that it directly but we cannot jump it
                     if not only_jumps:
@@ -175,9 +206,9 @@ class Board():
                         yield neighbour_tile
                 else:
                     # Neighbour is not empty, maybe we can jump
-                    neighbours_neighbour: Tile = neighbour_tile.get_neighbours().get(neighbour_direction, None)
-                    if neighbours_neighbour is not None:
-                        # The neighbour exists
+                    if next_index is not None:
+                        neighbours_neighbour: Tile = self.board_tiles[next_index]
+                        # The tile behind the neighbour exists
                         if neighbours_neighbour.is_empty():
                             # It exists and it is empty, we can jump to it
                             if neighbours_neighbour not in already_returned:
@@ -200,9 +231,9 @@ class Board():
     def get_all_valid_moves(self, tile_origin: Tile):
         for move in self.get_all_possible_tiles_to_move(tile_origin):
             # Moves that are not valid: move a piece that already rests in its target triangle out of that triangle
-            if tile_origin.get_piece().is_player2_piece()  and  tile_origin in self.get_top_triangle_tiles()  and   move not in self.get_top_triangle_tiles():
+            if tile_origin.is_in_top_triangle  and  not move.is_in_top_triangle  and  tile_origin.piece.owner == Piece.PLAYER2:
                 continue
-            elif tile_origin.get_piece().is_player1_piece()  and  tile_origin in self.get_bottom_triangle_tiles()  and  move not in self.get_bottom_triangle_tiles():
+            elif tile_origin.is_in_bottom_triangle  and  not move.is_in_bottom_triangle  and  tile_origin.piece.owner == Piece.PLAYER1:
                 continue
             else:
                 yield move
@@ -213,6 +244,67 @@ class Board():
             if heuristic_function(tile_origin, tile_destination):
                 yield tile_destination
 
+    """Returns a list with all the valid (origin, destination) moves of the player that satisfy the heuristic function (all of them if it is None).
+    The moves are the same and in the same order as calling get_all_valid_logical_moves for every tile of the player, but the jumps are
+    followed with an explicit stack over the (neighbour, next tile) pairs of topology.jumps instead of nested generators"""
+    def get_all_player_moves(self, is_player1: bool, heuristic_function = None) -> list[tuple[Tile, Tile]]:
+        moves: list[tuple[Tile, Tile]] = []
+        owner: int = Piece.PLAYER1 if is_player1 else Piece.PLAYER2
+        tiles: list[Tile] = self.board_tiles
+        jump_table = self.topology.jumps
+        reached_marks: list[int] = self.reached_marks
+        pending_tiles, pending_positions = self.pending_tiles, self.pending_positions
+
+        for tile_origin in self.board_tiles:
+            if tile_origin.piece is None  or  tile_origin.piece.owner != owner:
+                continue
+
+            # A piece that already rests in its target triangle cannot leave it
+            if is_player1:
+                must_stay_in_triangle: bool = tile_origin.is_in_bottom_triangle
+            else:
+                must_stay_in_triangle: bool = tile_origin.is_in_top_triangle
+
+            self.reached_generation += 1
+            generation: int = self.reached_generation
+            reached_marks[tile_origin.index] = generation
+            first_move_index: int = len(moves)
+
+            # Depth first search of the jumps, in the same order as get_all_possible_tiles_to_move
+            pending_tiles.append(tile_origin)
+            pending_positions.append(0)
+            while pending_tiles:
+                tile = pending_tiles[-1]
+                position: int = pending_positions[-1]
+                tile_jumps = jump_table[tile.index]
+                if position == len(tile_jumps):
+                    pending_tiles.pop()
+                    pending_positions.pop()
+                    continue
+                pending_positions[-1] = position + 1
+
+                (neighbour_index, next_index) = tile_jumps[position]
+                if tiles[neighbour_index].piece is None:
+                    # Moving to an empty neighbour is only possible from the origin
+                    if tile is tile_origin  and  reached_marks[neighbour_index] != generation:
+                        reached_marks[neighbour_index] = generation
+                        moves.append((tile_origin, tiles[neighbour_index]))
+                elif next_index is not None  and  tiles[next_index].piece is None  and  reached_marks[next_index] != generation:
+                    reached_marks[next_index] = generation
+                    neighbours_neighbour: Tile = tiles[next_index]
+                    moves.append((tile_origin, neighbours_neighbour))
+                    pending_tiles.append(neighbours_neighbour)
+                    pending_positions.append(0)
+
+            if must_stay_in_triangle  and  is_player1:
+                moves[first_move_index:] = [move for move in moves[first_move_index:] if move[1].is_in_bottom_triangle]
+            elif must_stay_in_triangle:
+                moves[first_move_index:] = [move for move in moves[first_move_index:] if move[1].is_in_top_triangle]
+            if heuristic_function is not None:
+                moves[first_move_index:] = [move for move in moves[first_move_index:] if heuristic_function(*move)]
+
+        return moves
+
                                     
     """Moves the piece in the arguments to the tile in the paramenters. If the movement is not possible it does nothing returns False"""
     def move_piece_to_tile(self, tile_origin: Tile, destination_tile: Tile) -> bool:
@@ -223,52 +315,48 @@ class Board():
         destination_tile.set_piece(tile_origin.get_piece())
         tile_origin.set_empty()
 
+        origin_index, destination_index = tile_origin.index, destination_tile.index
+        topology: BoardTopology = self.topology
+
+        if destination_tile.piece.owner == Piece.PLAYER1:
+            # Update the hash with the keys of the piece in the old and in the new tile
+            self.hash ^= Zobrist.PLAYER1_KEYS[origin_index] ^ Zobrist.PLAYER1_KEYS[destination_index]
+            self.mirror_hash ^= topology.mirror_player1_keys[origin_index] ^ topology.mirror_player1_keys[destination_index]
+
+            # Update the running totals with the scores of the tiles in the topology
+            self.player1_score1 += topology.score1_for_player1[destination_index] - topology.score1_for_player1[origin_index]
+            self.player1_score2 += topology.score2_for_player1[destination_index] - topology.score2_for_player1[origin_index]
+            self.player1_in_top += destination_tile.is_in_top_triangle - tile_origin.is_in_top_triangle
+            self.player1_in_bottom += destination_tile.is_in_bottom_triangle - tile_origin.is_in_bottom_triangle
+        else:
+            self.hash ^= Zobrist.PLAYER2_KEYS[origin_index] ^ Zobrist.PLAYER2_KEYS[destination_index]
+            self.mirror_hash ^= topology.mirror_player2_keys[origin_index] ^ topology.mirror_player2_keys[destination_index]
+
+            self.player2_score1 += topology.score1_for_player2[destination_index] - topology.score1_for_player2[origin_index]
+            self.player2_score2 += topology.score2_for_player2[destination_index] - topology.score2_for_player2[origin_index]
+            self.player2_in_top += destination_tile.is_in_top_triangle - tile_origin.is_in_top_triangle
+            self.player2_in_bottom += destination_tile.is_in_bottom_triangle - tile_origin.is_in_bottom_triangle
+
         return True
 
-    """Calculates for all tiles in the board the distance from that tile to tiles in the top and bottom edges"""
-    def calculate_tiles_scores(self) -> None:
-        pending_of_exploring: list[Tile]
-
-        # Evaluation function 1
-        # Calculate scores for player1 player
-        pending_of_exploring = [self.board_tiles[-1]]
-        pending_of_exploring[0].set_score1_for_player1(16)
-        while any(pending_of_exploring):
-            exploring_tile, pending_of_exploring = pending_of_exploring[0], pending_of_exploring[1:]
-            pending_of_exploring.extend( [tile for tile in exploring_tile.get_neighbours().values() if tile.set_score1_for_player1(exploring_tile.get_score1_for_player1() - 1)] )
-        for tile in self.get_bottom_triangle_tiles():
-            tile.set_score1_for_player1(5 + tile.get_score1_for_player1())
-        
-        # Calculate scores for player2 player
-        pending_of_exploring = [self.board_tiles[0]]
-        pending_of_exploring[0].set_score1_for_player2(16)
-        while any(pending_of_exploring):
-            exploring_tile, pending_of_exploring = pending_of_exploring[0], pending_of_exploring[1:]
-            pending_of_exploring.extend( [tile for tile in exploring_tile.get_neighbours().values() if tile.set_score1_for_player2(exploring_tile.get_score1_for_player2() - 1)] )
-        for tile in self.get_top_triangle_tiles():
-            tile.set_score1_for_player2(5 + tile.get_score1_for_player2())
-
-        # Evaluation function 2
-        # Player 1
-        for i in range(len(self.board_row_tiles)):
-            row = self.board_row_tiles[i]
-            for j in range(len(row)):
-                if len(row) % 2 == 0:
-                    row[j].set_score2_for_player1(1*10 - abs(int((len(row)-1)/2 - j)))
-                else:
-                    row[j].set_score2_for_player1(i*10 - abs(len(row)//2 - j))
-        for tile in self.get_bottom_triangle_tiles():
-            tile.set_score2_for_player1(tile.get_score2_for_player1() + 50)
-        # Player2
-        for i in range(len(self.board_row_tiles)):
-            row = self.board_row_tiles[i]
-            for j in range(len(row)):
-                if len(row) % 2 == 0:
-                    row[j].set_score2_for_player2((16-i)*10 - abs(int((len(row)-1)/2 - j)))
-                else:
-                    row[j].set_score2_for_player2((16-i)*10 - abs(len(row)//2 - j))
-        for tile in self.get_top_triangle_tiles():
-            tile.set_score2_for_player2(tile.get_score2_for_player2() + 50)
+    """Calculates the Zobrist hash of the current position from scratch"""
+    def calculate_hash(self) -> int:
+        return Zobrist.hash_masks(*self.get_player_masks())
+
+    """Returns the Zobrist hash of the current position"""
+    def get_hash(self) -> int:
+        return self.hash
+
+    """Calculates from scratch the Zobrist hash of the position reflected left-right"""
+    def calculate_mirror_hash(self) -> int:
+        player1_mask, player2_mask = self.get_player_masks()
+        mirror_tiles: tuple[int, ...] = self.topology.mirror_tiles
+        return Zobrist.hash_masks(sum(1 << mirror_tiles[i] for i in range(len(mirror_tiles)) if player1_mask >> i & 1),
+                                  sum(1 << mirror_tiles[i] for i in range(len(mirror_tiles)) if player2_mask >> i & 1))
+
+    """Returns the Zobrist hash of the position reflected left-right (the same as get_hash if the position is symmetric)"""
+    def get_mirror_hash(self) -> int:
+        return self.mirror_hash
 
     """Prints the board in the command line"""
     def print_board(self, numbered_tiles=None, characters="123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ") -> None:
@@ -298,12 +386,134 @@ class Board():
         return res
 
     
-    """Returns if both tiles are in the same row"""
+    """Returns the index of the row of the tile"""
     def get_row_index(self, tile: Tile) -> int:
-        for i in range(len(self.board_row_tiles)):
-            if tile in self.board_row_tiles[i]:
-                return i
+        return tile.row
     
+    """Counts the leaves of the tree of all the valid moves up to the depth, with both players moving alternately"""
+    def perft(self, depth: int, is_player1_turn: bool) -> int:
+        if depth == 0:
+            return 1
+
+        moves: list[tuple[Tile, Tile]] = self.get_all_player_moves(is_player1_turn)
+        if depth == 1:
+            return len(moves)
+
+        nodes: int = 0
+        for (tile_origin, tile_destination) in moves:
+            self.move_piece_to_tile(tile_origin, tile_destination)
+            nodes += self.perft(depth-1, not is_player1_turn)
+            self.move_piece_to_tile(tile_destination, tile_origin)
+        return nodes
+
     """Returns the tile that contain the piece in the argument"""
     def get_tile(self, piece: Piece):
         return next(tile for tile in self.board_tiles if tile.get_piece() is piece)
+
+    """Returns two integers (player1, player2) where the bit i is set if the tile i contains a piece of that player"""
+    def get_player_masks(self) -> tuple[int, int]:
+        player1_mask, player2_mask = 0, 0
+        for i in range(len(self.board_tiles)):
+            if not self.board_tiles[i].is_empty():
+                if self.board_tiles[i].get_piece().is_player1_piece():
+                    player1_mask |= 1 << i
+                else:
+                    player2_mask |= 1 << i
+        return player1_mask, player2_mask
+
+    """Places the pieces of both players in the tiles whose bits are set in the masks"""
+    def set_player_masks(self, player1_mask: int, player2_mask: int) -> None:
+        player1_indexes = [i for i in range(len(self.board_tiles)) if player1_mask >> i & 1]
+        player2_indexes = [i for i in range(len(self.board_tiles)) if player2_mask >> i & 1]
+        if len(player1_indexes) != 10  or  len(player2_indexes) != 10  or  player1_mask & player2_mask:
+            raise ValueError("Each player must have 10 pieces in different tiles")
+
+        for tile in self.board_tiles:
+            tile.set_empty()
+        for (i, piece) in zip(player1_indexes, self.get_player1_pieces()):
+            self.board_tiles[i].set_piece(piece)
+        for (i, piece) in zip(player2_indexes, self.get_player2_pieces()):
+            self.board_tiles[i].set_piece(piece)
+        self.hash = self.calculate_hash()
+        self.mirror_hash = self.calculate_mirror_hash()
+        self.set_incremental_state(self.calculate_incremental_state())
+
+    """Returns the position, which is enough to restore it later with restore: the indexes of the tiles of each player,
+    the hashes and the running totals"""
+    def snapshot(self) -> tuple:
+        player1_indexes: list[int] = []
+        player2_indexes: list[int] = []
+        for tile in self.board_tiles:
+            if tile.piece is not None:
+                (player1_indexes if tile.piece.owner == Piece.PLAYER1 else player2_indexes).append(tile.index)
+        return (tuple(player1_indexes), tuple(player2_indexes), self.hash, self.mirror_hash, self.get_incremental_state())
+
+    """Goes back to a position returned by snapshot without calculating anything again"""
+    def restore(self, snapshot: tuple) -> None:
+        (player1_indexes, player2_indexes, position_hash, mirror_hash, incremental_state) = snapshot
+        for tile in self.board_tiles:
+            tile.piece = None
+        for (i, piece) in zip(player1_indexes, self.get_player1_pieces()):
+            self.board_tiles[i].piece = piece
+        for (i, piece) in zip(player2_indexes, self.get_player2_pieces()):
+            self.board_tiles[i].piece = piece
+        self.hash = position_hash
+        self.mirror_hash = mirror_hash
+        self.set_incremental_state(incremental_state)
+
+    """Returns a new board with the same position"""
+    def copy(self):
+        board: Board = Board(self.debug)
+        board.restore(self.snapshot())
+        return board
+
+    """Returns the position as a single integer: the bits 0-120 are the tiles of the player1 and the bits 121-241 the ones of the player2"""
+    def to_int(self) -> int:
+        player1_mask, player2_mask = self.get_player_masks()
+        return player1_mask | player2_mask << Board.NUMBER_OF_TILES
+
+    """Returns the position in Board.POSITION_BYTES bytes (the integer of to_int in little endian)"""
+    def to_bytes(self) -> bytes:
+        return self.to_int().to_bytes(Board.POSITION_BYTES, "little")
+
+    """Returns the position as a string of 121 characters, one per tile in the order of board_tiles ("O", "X" or ".")"""
+    def to_position_string(self) -> str:
+        return "".join(str(tile) for tile in self.board_tiles)
+
+    """Places the pieces like in an integer returned by to_int"""
+    def set_position_int(self, position: int) -> None:
+        self.set_player_masks(position & ((1 << Board.NUMBER_OF_TILES) - 1), position >> Board.NUMBER_OF_TILES)
+
+    def set_position_bytes(self, data: bytes) -> None:
+        if len(data) != Board.POSITION_BYTES:
+            raise ValueError(f"A position has {Board.POSITION_BYTES} bytes, not {len(data)}")
+        self.set_position_int(int.from_bytes(data, "little"))
+
+    def set_position_string(self, text: str) -> None:
+        if len(text) != Board.NUMBER_OF_TILES  or  any(c not in [Piece.PLAYER1_COLOR, Piece.PLAYER2_COLOR, Tile.EMPTY_TYLE_STR] for c in text):
+            raise ValueError(f"A position has {Board.NUMBER_OF_TILES} characters, each one {Piece.PLAYER1_COLOR}, {Piece.PLAYER2_COLOR} or {Tile.EMPTY_TYLE_STR}")
+        player1_mask: int = sum(1 << i for (i, c) in enumerate(text) if c == Piece.PLAYER1_COLOR)
+        player2_mask: int = sum(1 << i for (i, c) in enumerate(text) if c == Piece.PLAYER2_COLOR)
+        self.set_player_masks(player1_mask, player2_mask)
+
+    @classmethod
+    def from_int(cls, position: int, debug: bool = False):
+        board: Board = Board(debug)
+        board.set_position_int(position)
+        return board
+
+    @classmethod
+    def from_bytes(cls, data: bytes, debug: bool = False):
+        board: Board = Board(debug)
+        board.set_position_bytes(data)
+        return board
+
+    @classmethod
+    def from_position_string(cls, text: str, debug: bool = False):
+        board: Board = Board(debug)
+        board.set_position_string(text)
+        return board
+
+    # A board is sent to other processes as its position in bytes instead of the whole graph of tiles
+    def __reduce__(self):
+        return (Board.from_bytes, (self.to_bytes(), self.debug))
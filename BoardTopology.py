@@ -0,0 +1,137 @@
+from collections import deque
+import Zobrist
+
+"""The part of the board that never changes: the rows, the neighbours and jumps of every tile, the triangles and the
+score tables of both evaluation functions. Everything is stored by tile index in tuples, so it is computed only once
+per process (see get_topology) and shared, read-only, by every Board"""
+class BoardTopology():
+    def __init__(self, tiles_per_row: list[int], triangle_rows: int) -> None:
+        self.tiles_per_row: tuple[int, ...] = tuple(tiles_per_row)
+        self.number_of_tiles: int = sum(tiles_per_row)
+
+        # Indexes of the tiles of every row, and row of every tile
+        rows: list[list[int]] = []
+        index: int = 0
+        for length in tiles_per_row:
+            rows.append(list(range(index, index + length)))
+            index += length
+        self.rows: tuple[tuple[int, ...], ...] = tuple(tuple(row) for row in rows)
+        self.tile_rows: tuple[int, ...] = tuple(i for (i, row) in enumerate(rows) for _ in row)
+
+        self.in_top_triangle: tuple[bool, ...] = tuple(row < triangle_rows for row in self.tile_rows)
+        self.in_bottom_triangle: tuple[bool, ...] = tuple(row >= len(tiles_per_row) - triangle_rows for row in self.tile_rows)
+        self.top_triangle: tuple[int, ...] = tuple(i for i in range(self.number_of_tiles) if self.in_top_triangle[i])
+        self.bottom_triangle: tuple[int, ...] = tuple(i for i in range(self.number_of_tiles) if self.in_bottom_triangle[i])
+
+        # neighbours[i] = ((direction, neighbour index), ...) in the order the neighbours were linked
+        self.neighbours: tuple[tuple[tuple[str, int], ...], ...] = self.calculate_neighbours(rows)
+        # jumps[i] = ((neighbour index, index of the next tile in the same direction or None), ...) in the same order as neighbours[i]
+        neighbour_dicts: list[dict[str, int]] = [dict(tile_neighbours) for tile_neighbours in self.neighbours]
+        self.jumps: tuple[tuple[tuple[int, int], ...], ...] = tuple(
+            tuple((neighbour, neighbour_dicts[neighbour].get(direction, None)) for (direction, neighbour) in tile_neighbours)
+            for tile_neighbours in self.neighbours)
+
+        (self.score1_for_player1, self.score1_for_player2, self.score2_for_player1, self.score2_for_player2) = self.calculate_scores(rows)
+
+        # Permutations of the symmetries of the board: mirror_tiles[i] is the tile i reflected left-right (in the same row)
+        # and rotation_tiles[i] the tile i rotated 180 degrees (the triangles of the players are swapped)
+        self.mirror_tiles: tuple[int, ...] = tuple(row[len(row) - 1 - j] for row in rows for j in range(len(row)))
+        self.rotation_tiles: tuple[int, ...] = tuple(rows[len(rows) - 1 - i][len(row) - 1 - j] for (i, row) in enumerate(rows) for j in range(len(row)))
+        # Zobrist keys of the mirrored tiles, so boards can keep the hash of their mirrored position with every move
+        self.mirror_player1_keys: tuple[int, ...] = tuple(Zobrist.PLAYER1_KEYS[i] for i in self.mirror_tiles)
+        self.mirror_player2_keys: tuple[int, ...] = tuple(Zobrist.PLAYER2_KEYS[i] for i in self.mirror_tiles)
+
+        # (hash, mirrored hash, running totals) of the start position, set by the first Board
+        self.start_position_state: tuple = None
+
+    """Links the neighbours of every tile, in the same order and with the same directions as the tiles of the original board"""
+    def calculate_neighbours(self, rows: list[list[int]]) -> tuple[tuple[tuple[str, int], ...], ...]:
+        neighbours: list[dict[str, int]] = [{} for _ in range(self.number_of_tiles)]
+
+        # Edges within the row
+        for row in rows:
+            for i in range(0, len(row)-1):
+                neighbours[row[i]]["R"] = row[i+1]
+            for i in range(1, len(row)):
+                neighbours[row[i]]["L"] = row[i-1]
+
+        # Diagonal edges (1/4)
+        for row_index in [0, 1, 2, 8, 9, 10, 11]:
+            for tile_index in range(len(rows[row_index])):
+                neighbours[rows[row_index    ][tile_index    ]]["DL"] = rows[row_index+1][tile_index]
+                neighbours[rows[row_index    ][tile_index    ]]["DR"] = rows[row_index+1][tile_index+1]
+                neighbours[rows[row_index + 1][tile_index    ]]["UR"] = rows[row_index][tile_index]
+                neighbours[rows[row_index + 1][tile_index + 1]]["UL"] = rows[row_index][tile_index]
+
+        # Diagonal edges (2/4)
+        for row_index in [5, 6, 7, 8, 14, 15, 16]:
+            for tile_index in range(len(rows[row_index])):
+                neighbours[rows[row_index    ][tile_index    ]]["UL"] = rows[row_index - 1][tile_index]
+                neighbours[rows[row_index    ][tile_index    ]]["UR"] = rows[row_index - 1][tile_index+1]
+                neighbours[rows[row_index - 1][tile_index    ]]["DR"] = rows[row_index    ][tile_index]
+                neighbours[rows[row_index - 1][tile_index + 1]]["DL"] = rows[row_index    ][tile_index]
+
+        # Diagonal edges (3/4)
+        for tile_index in range(len(rows[3])):
+            neighbours[rows[3][tile_index    ]]["DL"] = rows[4][tile_index + 4]
+            neighbours[rows[3][tile_index    ]]["DR"] = rows[4][tile_index + 5]
+            neighbours[rows[4][tile_index + 4]]["UR"] = rows[3][tile_index]
+            neighbours[rows[4][tile_index + 5]]["UL"] = rows[3][tile_index]
+
+        # Diagonal edges (4/4)
+        for tile_index in range(len(rows[13])):
+            neighbours[rows[13][tile_index    ]]["UL"] = rows[12][tile_index + 4]
+            neighbours[rows[13][tile_index    ]]["UR"] = rows[12][tile_index + 5]
+            neighbours[rows[12][tile_index + 4]]["DR"] = rows[13][tile_index]
+            neighbours[rows[12][tile_index + 5]]["DL"] = rows[13][tile_index]
+
+        return tuple(tuple(tile_neighbours.items()) for tile_neighbours in neighbours)
+
+    """Returns the distance (in steps to neighbours) from the tile to every tile, with a breadth first search"""
+    def calculate_distances(self, start: int) -> list[int]:
+        distances: list[int] = [-1] * self.number_of_tiles
+        distances[start] = 0
+        pending_of_exploring: deque[int] = deque([start])
+        while pending_of_exploring:
+            exploring_tile: int = pending_of_exploring.popleft()
+            for (_, neighbour) in self.neighbours[exploring_tile]:
+                if distances[neighbour] == -1:
+                    distances[neighbour] = distances[exploring_tile] + 1
+                    pending_of_exploring.append(neighbour)
+        return distances
+
+    """Calculates the score of every tile for both evaluation functions and players"""
+    def calculate_scores(self, rows: list[list[int]]) -> tuple[tuple[int, ...], ...]:
+        # Evaluation function 1: 16 minus the distance to the farthest tile of the target triangle, plus 5 inside it
+        distances_to_bottom: list[int] = self.calculate_distances(self.number_of_tiles - 1)
+        distances_to_top: list[int] = self.calculate_distances(0)
+        score1_for_player1: list[int] = [16 - d + (5 if self.in_bottom_triangle[i] else 0) for (i, d) in enumerate(distances_to_bottom)]
+        score1_for_player2: list[int] = [16 - d + (5 if self.in_top_triangle[i] else 0) for (i, d) in enumerate(distances_to_top)]
+
+        # Evaluation function 2: 10 per row advanced minus the distance to the center of the row, plus 50 inside the target triangle
+        score2_for_player1: list[int] = [0] * self.number_of_tiles
+        score2_for_player2: list[int] = [0] * self.number_of_tiles
+        for i in range(len(rows)):
+            row = rows[i]
+            for j in range(len(row)):
+                if len(row) % 2 == 0:
+                    score2_for_player1[row[j]] = 1*10 - abs(int((len(row)-1)/2 - j))
+                    score2_for_player2[row[j]] = (16-i)*10 - abs(int((len(row)-1)/2 - j))
+                else:
+                    score2_for_player1[row[j]] = i*10 - abs(len(row)//2 - j)
+                    score2_for_player2[row[j]] = (16-i)*10 - abs(len(row)//2 - j)
+        for i in self.bottom_triangle:
+            score2_for_player1[i] += 50
+        for i in self.top_triangle:
+            score2_for_player2[i] += 50
+
+        return tuple(score1_for_player1), tuple(score1_for_player2), tuple(score2_for_player1), tuple(score2_for_player2)
+
+# Topology of every board of this process, created the first time it is needed
+topology: BoardTopology = None
+
+def get_topology(tiles_per_row: list[int], triangle_rows: int) -> BoardTopology:
+    global topology
+    if topology is None  or  topology.tiles_per_row != tuple(tiles_per_row):
+        topology = BoardTopology(tiles_per_row, triangle_rows)
+    return topology
@@ -1,6 +1,8 @@
+import argparse
 from random import choice
 from Board import Board
 from Players import Player_Computer, Player_Person
+from GameRecord import create_record, get_result, append_record
 
 """Asks the user if the players are people, or instead the computer is going to play.
 Creates the players and returns them"""
@@ -15,8 +17,18 @@ def create_computer_player(board: Board, name: str) -> Player_Computer:
     while res not in "1 2 3 4 5 6 7 8 9".split(" "):
         res = input("\tWhich depth? (1-9): ").strip().lower()
     depth = int(res)
-    
-    player = Player_Computer(name, eval_func, depth)
+
+    res = input("\tTime limit per move in seconds? (empty for no limit): ").strip()
+    while res != ""  and  not res.replace(".", "", 1).isdigit():
+        res = input("\tTime limit per move in seconds? (empty for no limit): ").strip()
+    time_per_move = float(res) if res != "" else None
+
+    res = input("\tDo you want the computer to think during the turn of the opponent? (y/n): ").strip().lower()
+    while res not in ["y", "yes", "n", "no"]:
+        res = input("\tDo you want the computer to think during the turn of the opponent? (y/n): ").strip().lower()
+    ponder = res in ["yes", "y"]
+
+    player = Player_Computer(name, eval_func, depth, time_per_move=time_per_move, ponder=ponder)
 
     res = input("\tDo you want the computer to use an heuristic? (y/n): ").strip().lower()
     while res not in ["y", "yes", "n", "no"]:
@@ -50,23 +62,47 @@ def create_players(board: Board) -> tuple[Player_Computer|Player_Person, Player_
 
     return player1, player2
 
-"""The implemented heuristic for the game"""
-def get_heuristic(b: Board, turn1: bool):
-    def h1(tile_origin, tile_destination) -> bool:
-        if turn1:
-            return board.get_row_index(tile_destination) >= board.get_row_index(tile_origin)
+"""The implemented heuristic for the game: do not move backwards.
+It is a class (not a closure) so it can be sent, together with its board, to the processes of the parallel search"""
+class Heuristic():
+    def __init__(self, b: Board, turn1: bool) -> None:
+        self.board: Board = b
+        self.turn1: bool = turn1
+
+    def __call__(self, tile_origin, tile_destination) -> bool:
+        if self.turn1:
+            return self.board.get_row_index(tile_destination) >= self.board.get_row_index(tile_origin)
         else:
-            return board.get_row_index(tile_destination) <= board.get_row_index(tile_origin)
+            return self.board.get_row_index(tile_destination) <= self.board.get_row_index(tile_origin)
 
-    return h1
+def get_heuristic(b: Board, turn1: bool):
+    return Heuristic(b, turn1)
+
+"""Returns how the player is stored in the record of the game: "human", or the config of the computer player like in Tournament.py"""
+def get_player_config(player: Player_Computer|Player_Person):
+    if isinstance(player, Player_Person):
+        return "human"
+    return {
+        "eval_func": player.get_eval_func(),
+        "depth": player.depth,
+        "heuristic": player.get_heuristic() is not Player_Computer.DEFAULT_HEURISTIC,
+        "time_per_move": player.time_per_move,
+        "ponder": player.ponder,
+    }
 
 # -----------------------------------------------------------------------------------
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays a game in the command line")
+    parser.add_argument("--record", default=None, help="File where the record of the game is added when it finishes (see GameRecord.py)")
+    args = parser.parse_args()
+
     board = Board()
     players = create_players(board)
 
     current_player_index = choice([0, 1])
+    first_player_index = current_player_index
+    moves = []
     print("\n----------------------------------------------------")
     print(f"{players[current_player_index].get_name()} starts\n")
 
@@ -74,6 +110,7 @@ if __name__ == "__main__":
         player = players[current_player_index]
         tile_origin, tile_destination = player.get_move(board)
         board.move_piece_to_tile(tile_origin, tile_destination)
+        moves.append([tile_origin.index, tile_destination.index])
         board.print_board()
         current_player_index = (current_player_index+1) % len(players)
     
@@ -81,3 +118,12 @@ if __name__ == "__main__":
         print("Player1 has won")
     else:
         print("Player2 has won")
+
+    if args.record is not None:
+        append_record(args.record, create_record(first_player_index + 1, get_result(board, players[current_player_index].is_player1()), moves,
+                                                 player1=get_player_config(players[0]), player2=get_player_config(players[1])))
+
+    for player in players:
+        if isinstance(player, Player_Computer)  and  player.ponder:
+            print(f"{player.get_name()} predicted {player.get_ponder_hit_rate():.0%} of the moves of the opponent")
+            player.close()
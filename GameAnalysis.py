@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from Board import Board
+from Players import minimax_pruning, accept_all_moves
+from Game import get_heuristic
+from GameRecord import read_records, replay_record
+
+"""Analyzes recorded games (see GameRecord.py): every position of every game is searched again at a fixed depth and the
+played move is compared with the best move of the search. The result of every move is written as a JSON line:
+    {"game": ..., "line": ..., "ply": ..., "player": 1 or 2, "move": [origin, destination], "score": ...,
+     "best_move": [origin, destination], "best_score": ..., "loss": best_score - score, "blunder": true/false}
+The scores are the ones of minimax_pruning for the player that moves, so they can be compared within a position.
+
+The positions are searched in a pool of processes. The records are read one at a time and at most window positions are
+waiting in the pool, so the memory used does not depend on the size of the input. The output keeps the order of the input"""
+
+"""Searches the position (encoded with Board.to_bytes) and scores the played move with the same search.
+Returns (score of the played move, best origin index, best destination index, best score)"""
+def analyze_position(position: bytes, is_player1_turn: bool, origin_index: int, destination_index: int, depth: int,
+                     eval_func: int, use_heuristic: bool) -> tuple[int, int, int, int]:
+    board = Board.from_bytes(position)
+    heuristic = get_heuristic(board, is_player1_turn) if use_heuristic else accept_all_moves
+    use_eval_func_1: bool = eval_func == 1
+
+    best_score, best_origin, best_destination = minimax_pruning(board, depth, is_player1_turn, heuristic, use_eval_func_1)
+
+    # The played move is scored like a move of the root of the search
+    tile_origin, tile_destination = board.board_tiles[origin_index], board.board_tiles[destination_index]
+    board.move_piece_to_tile(tile_origin, tile_destination)
+    score, _1, _2 = minimax_pruning(board, depth - 1, is_player1_turn, heuristic, use_eval_func_1, False)
+    board.move_piece_to_tile(tile_destination, tile_origin)
+
+    if best_origin is None  or  score > best_score:
+        # The heuristic did not let the search try the played move, and it is better than the best one found
+        best_score, best_origin, best_destination = score, tile_origin, tile_destination
+    return score, best_origin.index, best_destination.index, best_score
+
+"""Generator that outputs (game, line number, ply, position, is_player1_turn, origin index, destination index) for every
+move of the records of the file. The game is the "game" of the record, or its line number if it has none"""
+def iterate_positions(records_path: str, max_plies: int = None):
+    for (line_number, record) in read_records(records_path):
+        game = record.get("game", line_number)
+        for (ply, (board, is_player1_turn, origin_index, destination_index)) in enumerate(replay_record(record)):
+            if max_plies is not None  and  ply >= max_plies:
+                break
+            yield game, line_number, ply, board.to_bytes(), is_player1_turn, origin_index, destination_index
+
+"""Analyzes every move of the records and writes one JSON line per move to the output. Returns the number of moves
+analyzed and the number of blunders (moves that lose at least blunder_threshold points against the best move)"""
+def analyze_records(records_path: str, output, depth: int = 2, eval_func: int = 1, use_heuristic: bool = False,
+                    blunder_threshold: int = 10, workers: int = None, window: int = None, max_plies: int = None) -> dict:
+    summary: dict = {"moves": 0, "blunders": 0}
+
+    def write_result(item, future) -> None:
+        (game, line_number, ply, _, is_player1_turn, origin_index, destination_index) = item
+        (score, best_origin, best_destination, best_score) = future.result()
+        blunder: bool = best_score - score >= blunder_threshold
+        output.write(json.dumps({
+            "game": game,
+            "line": line_number,
+            "ply": ply,
+            "player": 1 if is_player1_turn else 2,
+            "move": [origin_index, destination_index],
+            "score": score,
+            "best_move": [best_origin, best_destination],
+            "best_score": best_score,
+            "loss": best_score - score,
+            "blunder": blunder,
+        }) + "\n")
+        summary["moves"] += 1
+        summary["blunders"] += blunder
+
+    workers = workers or os.cpu_count() or 1
+    # By default four positions per process, so no process waits while the results are written
+    window = window or 4 * workers
+    with ProcessPoolExecutor(workers) as executor:
+        pending: deque = deque()
+        for item in iterate_positions(records_path, max_plies):
+            (_, _, _, position, is_player1_turn, origin_index, destination_index) = item
+            pending.append((item, executor.submit(analyze_position, position, is_player1_turn, origin_index, destination_index,
+                                                  depth, eval_func, use_heuristic)))
+            if len(pending) >= window:
+                write_result(*pending.popleft())
+        while pending:
+            write_result(*pending.popleft())
+    return summary
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Searches again every position of recorded games and finds the blunders")
+    parser.add_argument("records", help="File with one game record per line (like the output of Tournament.py)")
+    parser.add_argument("--output", default=None, help="File for the analysis (default: standard output)")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--eval-func", type=int, choices=[1, 2], default=1)
+    parser.add_argument("--heuristic", action="store_true")
+    parser.add_argument("--blunder-threshold", type=int, default=10, help="Points lost against the best move that make a move a blunder")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--window", type=int, default=None, help="Positions waiting in the pool at the same time (default: four per process)")
+    parser.add_argument("--max-plies", type=int, default=None, help="Only analyze the first moves of every game")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        summary = analyze_records(args.records, output, args.depth, args.eval_func, args.heuristic, args.blunder_threshold,
+                                  args.workers, args.window, args.max_plies)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{summary['moves']} moves analyzed, {summary['blunders']} blunders", file=sys.stderr)
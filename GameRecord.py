@@ -0,0 +1,56 @@
+import json
+from Board import Board
+
+"""Records of finished games, one JSON object per line, in the same format used by Tournament.py:
+    {"first_player": 1 or 2, "result": ..., "moves": [[origin index, destination index], ...], ...}
+The result is "player1", "player2", "no_move_player1", "no_move_player2" or "max_moves", and any other key (the players,
+the times, ...) is kept as it is. The files are read one line at a time, so they can be of any size"""
+
+RESULTS: list[str] = ["player1", "player2", "no_move_player1", "no_move_player2", "max_moves"]
+
+"""Returns the record of a game. extra has the optional keys (for example the configs of the players)"""
+def create_record(first_player: int, result: str, moves: list[list[int]], **extra) -> dict:
+    if first_player not in [1, 2]:
+        raise ValueError("first_player must be 1 or 2")
+    if result not in RESULTS:
+        raise ValueError(f"The result must be one of {RESULTS}")
+    record: dict = {"first_player": first_player, "result": result, "moves": [list(move) for move in moves]}
+    record.update(extra)
+    return record
+
+"""Returns the result of a game that stopped in this position, with is_player1_turn the player that had to move"""
+def get_result(board: Board, is_player1_turn: bool) -> str:
+    if board.has_game_ended():
+        return "player1" if board.has_player1_won() else "player2"
+    if not board.get_all_player_moves(is_player1_turn):
+        return "no_move_player1" if is_player1_turn else "no_move_player2"
+    return "max_moves"
+
+def write_record(output, record: dict) -> None:
+    output.write(json.dumps(record) + "\n")
+
+"""Adds the record at the end of the file"""
+def append_record(path: str, record: dict) -> None:
+    with open(path, "a") as output:
+        write_record(output, record)
+
+"""Generator that outputs (line number, record) for every record of the file, reading one line at a time (blank lines are skipped)"""
+def read_records(path: str):
+    with open(path) as records:
+        for (line_number, line) in enumerate(records, 1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+"""Generator that plays the moves of the record on a new board and outputs (board, is_player1_turn, origin index,
+destination index) before every move. The board is the same object every time and the move is made when the next item
+is requested, so it must be copied or encoded if it is kept. Raises ValueError if a move is not valid"""
+def replay_record(record: dict):
+    board = Board()
+    is_player1_turn: bool = record["first_player"] == 1
+    for (ply, (origin_index, destination_index)) in enumerate(record["moves"]):
+        tile_origin, tile_destination = board.board_tiles[origin_index], board.board_tiles[destination_index]
+        if (tile_origin, tile_destination) not in board.get_all_player_moves(is_player1_turn):
+            raise ValueError(f"The move {ply} ({origin_index}, {destination_index}) is not valid")
+        yield board, is_player1_turn, origin_index, destination_index
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        is_player1_turn = not is_player1_turn
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from Board import Board
+from Piece import Piece
+from Players import Player_Computer
+from MCTS import Player_MCTS, RANDOM_ROLLOUT, GREEDY_ROLLOUT
+from Game import get_heuristic
+from OpeningBook import OpeningBook
+from RaceSolver import RaceSolver
+
+"""Hosts many games at the same time over TCP. Every message, in both directions, is a JSON object in a single line.
+
+Requests of the client (the answer is sent to the same connection):
+    {"type": "new_game", "player1": "human" or a player config, "player2": ..., "first_player": 1 or 2}
+        -> {"type": "game", ...}, followed by the moves of the computer if it starts
+    {"type": "move", "game_id": id, "move": [origin index, destination index]}
+        -> {"type": "move", ...} for the move of the person and for every move of the computer after it
+    {"type": "state", "game_id": id}  -> {"type": "game", ...}
+    {"type": "valid_moves", "game_id": id}  -> {"type": "valid_moves", "game_id": id, "moves": [[origin, destination], ...]}
+    {"type": "close_game", "game_id": id}  -> {"type": "closed", "game_id": id}
+Invalid requests (and lines longer than MAX_REQUEST_BYTES) are answered with {"type": "error", "message": ...}. A connection can only see and play the games it created,
+the game_id of any other game is answered as if the game did not exist.
+
+The player configs are like the ones of Tournament.py, but only with the keys of MINIMAX_PLAYER_KEYS (or MCTS_PLAYER_KEYS
+with "engine": "mcts") and within the limits of the server (see GameServer.parse_player). The server never opens a file
+named by a client: "opening_book" is the name of one of the books given to the server, and "race_solver": true uses the
+race table of the server. There are no workers nor pondering, the pool already uses every process, and time_per_game is
+not accepted because the player is created again for every move.
+
+The searches of the computer players run in a pool of processes so the server keeps answering while they search. Every
+process loads the books and the race table once, when it starts. At most max_pending_searches searches (by default one
+per process) are in the pool at the same time, from the moment they are sent until a process finishes them; the rest
+wait, and while a connection waits for a search no more of its requests are read.
+Every search can take at most move_timeout seconds, and all the searches of a player in a game at most game_timeout
+seconds. The player is told to search for a bit less than that, and a player that does not answer in time loses the game
+with the result timeout_player1 or timeout_player2"""
+
+HUMAN: str = "human"
+# Fraction of the time left that the player is told to search, the rest covers sending the position and the move between processes
+SEARCH_TIME_FRACTION: float = 0.9
+# Longest rollout of an MCTS player, in moves (it does not depend on the length of the games)
+MAX_PLAYOUT_CAP: int = 300
+# Longest request line read from a connection, a longer one is skipped and answered with an error
+MAX_REQUEST_BYTES: int = 64 * 1024
+
+MINIMAX_PLAYER_KEYS: list[str] = ["engine", "eval_func", "depth", "heuristic", "transposition_table_mb", "time_per_move", "beam_widths",
+                                  "move_ordering", "opening_book", "race_solver"]
+MCTS_PLAYER_KEYS: list[str] = ["engine", "eval_func", "iterations", "time_per_move", "exploration", "rollout_policy", "playout_cap"]
+# Values of the keys a config does not give (the same as in Tournament.py)
+MINIMAX_PLAYER_DEFAULTS: dict = {"engine": "minimax", "eval_func": 1, "depth": 2, "heuristic": False, "transposition_table_mb": 0,
+                                 "time_per_move": None, "beam_widths": None, "move_ordering": False, "opening_book": None, "race_solver": False}
+MCTS_PLAYER_DEFAULTS: dict = {"engine": "mcts", "eval_func": 1, "iterations": 1000, "time_per_move": None, "exploration": 1.4,
+                              "rollout_policy": RANDOM_ROLLOUT, "playout_cap": 60}
+
+def check_integer(config: dict, key: str, low: int, high: int) -> None:
+    value = config[key]
+    # bool is also an int
+    if not isinstance(value, int)  or  isinstance(value, bool)  or  not low <= value <= high:
+        raise ValueError(f"{key} must be an integer from {low} to {high}")
+
+"""Checks a number greater than low, and at most high"""
+def check_number(config: dict, key: str, low: float, high: float) -> None:
+    value = config[key]
+    if not isinstance(value, (int, float))  or  isinstance(value, bool)  or  not low < value <= high:
+        raise ValueError(f"{key} must be a number greater than {low} and at most {high}")
+
+def check_boolean(config: dict, key: str) -> None:
+    if not isinstance(config[key], bool):
+        raise ValueError(f"{key} must be true or false")
+
+def check_choice(config: dict, key: str, choices: list) -> None:
+    if config[key] not in choices:
+        raise ValueError(f"{key} must be one of {choices}")
+
+"""Reads the next line of the connection, b"" when it has closed. A line longer than the limit of the reader is skipped
+(read until its end without keeping it) and None is returned"""
+async def read_request_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # The connection closed, maybe after a last line without the separator
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed: int = e.consumed
+    try:
+        while True:
+            # The bytes already checked for the separator are discarded
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+    except asyncio.IncompleteReadError:
+        return b""
+
+# Opening books (by name) and race solver of each process of the pool, loaded once by init_server_worker
+worker_opening_books: dict[str, OpeningBook] = {}
+worker_race_solver: RaceSolver = None
+
+"""Initializes a process of the pool with the opening books {name: path} and the race table of the server"""
+def init_server_worker(opening_books: dict[str, str], race_table: str) -> None:
+    global worker_opening_books, worker_race_solver
+    worker_opening_books = {name: OpeningBook(path) for (name, path) in opening_books.items()}
+    worker_race_solver = RaceSolver(race_table) if race_table is not None else None
+
+"""Creates the computer player of a config checked by GameServer.parse_player, with the books and the race solver of the process"""
+def create_server_player(board: Board, name: str, config: dict) -> Player_Computer|Player_MCTS:
+    if config["engine"] == "mcts":
+        return Player_MCTS(name, config["iterations"], config["time_per_move"], config["exploration"], config["rollout_policy"],
+                           config["playout_cap"], config["eval_func"])
+
+    player = Player_Computer(name, config["eval_func"], config["depth"],
+                             transposition_table_mb=config["transposition_table_mb"],
+                             time_per_move=config["time_per_move"],
+                             opening_book=worker_opening_books[config["opening_book"]] if config["opening_book"] is not None else None,
+                             beam_widths=config["beam_widths"],
+                             move_ordering=config["move_ordering"],
+                             race_solver=worker_race_solver if config["race_solver"] else None)
+    if config["heuristic"]:
+        player.set_heuristic(get_heuristic(board, player.is_player1()))
+    return player
+
+"""Searches the move of a computer player in a process of the pool. Returns [origin index, destination index] or None if there is no move"""
+def search_move(position: bytes, is_player1: bool, config: dict):
+    board = Board.from_bytes(position)
+    player = create_server_player(board, "Player1" if is_player1 else "Player2", config)
+    tile_origin, tile_destination = player.get_move(board)
+    player.close()
+    return None if tile_origin is None else [tile_origin.index, tile_destination.index]
+
+"""A game of the server and its players (HUMAN or the config of a computer player)"""
+class ServerGame():
+    def __init__(self, game_id: int, player1, player2, is_player1_turn: bool, max_moves: int) -> None:
+        self.game_id: int = game_id
+        self.max_moves: int = max_moves
+        self.board: Board = Board()
+        self.players: dict[bool, object] = {True: player1, False: player2}
+        self.is_player1_turn: bool = is_player1_turn
+        self.moves: list[list[int]] = []
+        # Seconds searched by each computer player (by is_player1)
+        self.time_used: dict[bool, float] = {True: 0, False: 0}
+        # None while the game is being played
+        self.result: str = None
+
+    def is_human_turn(self) -> bool:
+        return self.players[self.is_player1_turn] == HUMAN
+
+    def get_valid_moves(self) -> list[list[int]]:
+        return [[tile_origin.index, tile_destination.index] for (tile_origin, tile_destination) in self.board.get_all_player_moves(self.is_player1_turn)]
+
+    """Makes the move (it must be valid) and updates the result if the game has finished"""
+    def play(self, origin_index: int, destination_index: int) -> dict:
+        player: int = 1 if self.is_player1_turn else 2
+        self.board.move_piece_to_tile(self.board.board_tiles[origin_index], self.board.board_tiles[destination_index])
+        self.moves.append([origin_index, destination_index])
+        self.is_player1_turn = not self.is_player1_turn
+        self.update_result()
+        return {"type": "move", "game_id": self.game_id, "player": player, "move": [origin_index, destination_index], "result": self.result}
+
+    def update_result(self) -> None:
+        if self.board.has_game_ended():
+            self.result = "player1" if self.board.has_player1_won() else "player2"
+        elif not self.board.get_all_player_moves(self.is_player1_turn):
+            self.result = "no_move_player1" if self.is_player1_turn else "no_move_player2"
+        elif len(self.moves) >= self.max_moves:
+            self.result = "max_moves"
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "game",
+            "game_id": self.game_id,
+            "board": self.board.to_position_string(),
+            "to_move": 1 if self.is_player1_turn else 2,
+            "moves": self.moves,
+            "result": self.result,
+        }
+
+class GameServer():
+    """opening_books are the {name: path} of the books the clients can choose by name, and race_table the path of the table of
+    the race solver (built and saved there if it does not exist). max_depth, max_transposition_table_mb and max_iterations
+    limit the player configs of the clients"""
+    def __init__(self, workers: int = None, max_pending_searches: int = None, move_timeout: float = 60, max_games: int = 1000,
+                 max_moves: int = 300, opening_books: dict[str, str] = None, race_table: str = None, max_depth: int = 6,
+                 max_transposition_table_mb: float = 64, max_iterations: int = 100_000, game_timeout: float = 600) -> None:
+        workers = workers or os.cpu_count() or 1
+        self.max_depth: int = max_depth
+        self.max_transposition_table_mb: float = max_transposition_table_mb
+        self.max_iterations: int = max_iterations
+
+        # The evaluation function of every book, so a config with a book of another function is rejected with the request
+        self.opening_books: dict[str, str] = dict(opening_books or {})
+        self.opening_book_eval_funcs: dict[str, int] = {}
+        for (name, path) in self.opening_books.items():
+            book = OpeningBook(path)
+            self.opening_book_eval_funcs[name] = book.eval_func
+            book.close()
+        # The table is built here, once, so the processes only have to load it
+        self.race_table: str = race_table
+        if race_table is not None:
+            RaceSolver(race_table)
+
+        self.workers: int = workers
+        self.executor: ProcessPoolExecutor = self.create_executor()
+        # Bounds the searches in the pool. By default there is one per process, so a search does not wait in the pool while its time runs
+        self.search_slots: asyncio.Semaphore = asyncio.Semaphore(max_pending_searches or workers)
+        self.move_timeout: float = move_timeout
+        self.game_timeout: float = game_timeout
+        self.max_games: int = max_games
+        self.max_moves: int = max_moves
+        self.games: dict[int, ServerGame] = {}
+        self.game_ids = itertools.count(1)
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        # The processes are spawned instead of forked: a forked process would inherit the sockets of the connections
+        # open at that moment and keep them open after the server closes them
+        return ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"), initializer=init_server_worker,
+                                   initargs=(self.opening_books, self.race_table))
+
+    """Replaces the pool after one of its processes died. Only the first search that finds the pool broken replaces it"""
+    def replace_broken_executor(self, executor: ProcessPoolExecutor) -> None:
+        if executor is self.executor:
+            self.executor = self.create_executor()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    """Returns the game of the request. A connection can only use the games it created"""
+    def get_game(self, request: dict, connection_games: set[int]) -> ServerGame:
+        game_id = request.get("game_id", None)
+        # bool is also an int, and an unhashable id (a list) could not be looked up
+        if not isinstance(game_id, int)  or  isinstance(game_id, bool):
+            raise ValueError("game_id must be an integer")
+        game: ServerGame = self.games.get(game_id, None) if game_id in connection_games else None
+        if game is None:
+            raise ValueError(f"There is no game {game_id}")
+        return game
+
+    """Reads the player of a new_game request: HUMAN or a computer player config, which is returned with all its keys.
+    Raises ValueError if the config has other keys or a value out of the limits of the server"""
+    def parse_player(self, player):
+        if player == HUMAN:
+            return HUMAN
+        if not isinstance(player, dict):
+            raise ValueError(f'A player must be "{HUMAN}" or a player config')
+
+        is_mcts: bool = player.get("engine", "minimax") == "mcts"
+        keys: list[str] = MCTS_PLAYER_KEYS if is_mcts else MINIMAX_PLAYER_KEYS
+        for key in player:
+            if key not in keys:
+                raise ValueError(f"{key} is not accepted in a player config, the keys are {keys}")
+        config: dict = dict(MCTS_PLAYER_DEFAULTS if is_mcts else MINIMAX_PLAYER_DEFAULTS)
+        config.update(player)
+
+        check_choice(config, "engine", ["minimax", "mcts"])
+        check_choice(config, "eval_func", [1, 2])
+        if config["time_per_move"] is not None:
+            check_number(config, "time_per_move", 0, self.move_timeout)
+        if is_mcts:
+            check_integer(config, "iterations", 1, self.max_iterations)
+            check_number(config, "exploration", 0, 10)
+            check_choice(config, "rollout_policy", [RANDOM_ROLLOUT, GREEDY_ROLLOUT])
+            check_integer(config, "playout_cap", 1, MAX_PLAYOUT_CAP)
+            return config
+
+        check_integer(config, "depth", 1, self.max_depth)
+        check_boolean(config, "heuristic")
+        check_boolean(config, "move_ordering")
+        check_boolean(config, "race_solver")
+        if config["transposition_table_mb"] != 0:
+            check_number(config, "transposition_table_mb", 0, self.max_transposition_table_mb)
+        if config["beam_widths"] is not None:
+            beam_widths = config["beam_widths"]
+            if not isinstance(beam_widths, list)  or  not 1 <= len(beam_widths) <= self.max_depth  or  not all(
+                    isinstance(width, int)  and  not isinstance(width, bool)  and  0 <= width <= 1000 for width in beam_widths):
+                raise ValueError(f"beam_widths must be a list of 1 to {self.max_depth} integers from 0 to 1000")
+        if config["opening_book"] is not None:
+            check_choice(config, "opening_book", list(self.opening_books))
+            if self.opening_book_eval_funcs[config["opening_book"]] not in [0, config["eval_func"]]:
+                raise ValueError(f"The opening book {config['opening_book']} was built with another evaluation function")
+        if config["race_solver"]  and  self.race_table is None:
+            raise ValueError("The server has no race table")
+        return config
+
+    """Gives back the slot of a search when its process finishes it. It is called from a thread of the pool"""
+    def release_search_slot(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self.search_slots.release)
+        except RuntimeError:
+            # The event loop has already finished
+            pass
+
+    """Plays the moves of the computer players until it is the turn of a person or the game ends, sending every move.
+    A player that does not find its move within the time left for the move and for its game loses the game. If the search
+    fails in its process the game ends with error_player1 or error_player2 and the error is sent"""
+    async def play_computer_moves(self, game: ServerGame, send) -> None:
+        loop = asyncio.get_running_loop()
+        while game.result is None  and  not game.is_human_turn():
+            is_player1: bool = game.is_player1_turn
+            time_left: float = min(self.move_timeout, self.game_timeout - game.time_used[is_player1])
+            if time_left <= 0:
+                game.result = "timeout_player1" if is_player1 else "timeout_player2"
+                await send(game.to_dict())
+                return
+            # The player stops its search by itself a bit before the time left
+            config: dict = dict(game.players[is_player1])
+            config["time_per_move"] = min(config["time_per_move"] or time_left, SEARCH_TIME_FRACTION * time_left)
+
+            await self.search_slots.acquire()
+            executor: ProcessPoolExecutor = self.executor
+            start: float = loop.time()
+            try:
+                try:
+                    search = executor.submit(search_move, game.board.to_bytes(), is_player1, config)
+                except BaseException:
+                    self.search_slots.release()
+                    raise
+                # The slot is only given back when the process finishes the search, even if the game stops waiting for it,
+                # so the searches that run out of time still count in the bound of the pool
+                search.add_done_callback(lambda _: self.release_search_slot(loop))
+                move = await asyncio.wait_for(asyncio.wrap_future(search), time_left)
+            except asyncio.TimeoutError:
+                game.result = "timeout_player1" if is_player1 else "timeout_player2"
+                await send(game.to_dict())
+                return
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self.replace_broken_executor(executor)
+                game.result = "error_player1" if is_player1 else "error_player2"
+                await send({"type": "error", "game_id": game.game_id, "message": f"The search of the player {1 if is_player1 else 2} failed: {e!r}"})
+                await send(game.to_dict())
+                return
+            finally:
+                game.time_used[is_player1] += loop.time() - start
+            if move is None:
+                game.update_result()
+                await send(game.to_dict())
+                return
+            await send(game.play(*move))
+
+    async def handle_request(self, request: dict, send, connection_games: set[int]) -> None:
+        request_type = request.get("type", None)
+
+        if request_type == "new_game":
+            if len(self.games) >= self.max_games:
+                raise ValueError("The server has too many games")
+            first_player = request.get("first_player", 1)
+            if first_player not in [1, 2]:
+                raise ValueError("first_player must be 1 or 2")
+            player1, player2 = self.parse_player(request.get("player1", HUMAN)), self.parse_player(request.get("player2", HUMAN))
+            game = ServerGame(next(self.game_ids), player1, player2, first_player == 1, self.max_moves)
+            self.games[game.game_id] = game
+            connection_games.add(game.game_id)
+            await send(game.to_dict())
+            await self.play_computer_moves(game, send)
+
+        elif request_type == "move":
+            game: ServerGame = self.get_game(request, connection_games)
+            if game.result is not None:
+                raise ValueError(f"The game {game.game_id} has finished")
+            if not game.is_human_turn():
+                raise ValueError(f"It is not the turn of a person in the game {game.game_id}")
+            move = request.get("move", None)
+            if not isinstance(move, list)  or  len(move) != 2  or  not all(isinstance(i, int)  and  not isinstance(i, bool)  and  0 <= i < Board.NUMBER_OF_TILES for i in move):
+                raise ValueError("move must be [origin index, destination index]")
+
+            tile_origin, tile_destination = game.board.board_tiles[move[0]], game.board.board_tiles[move[1]]
+            owner: int = Piece.PLAYER1 if game.is_player1_turn else Piece.PLAYER2
+            if tile_origin.is_empty()  or  tile_origin.get_piece().get_owner() != owner  or  tile_destination not in game.board.get_all_valid_moves(tile_origin):
+                raise ValueError(f"{move} is not a valid move")
+            await send(game.play(*move))
+            await self.play_computer_moves(game, send)
+
+        elif request_type == "state":
+            await send(self.get_game(request, connection_games).to_dict())
+
+        elif request_type == "valid_moves":
+            game: ServerGame = self.get_game(request, connection_games)
+            await send({"type": "valid_moves", "game_id": game.game_id, "moves": game.get_valid_moves() if game.result is None else []})
+
+        elif request_type == "close_game":
+            game: ServerGame = self.get_game(request, connection_games)
+            self.games.pop(game.game_id)
+            connection_games.discard(game.game_id)
+            await send({"type": "closed", "game_id": game.game_id})
+
+        else:
+            raise ValueError(f"Unknown request type {request_type}")
+
+    """Serves one connection. Its requests are handled one after the other, and its games are removed when it closes"""
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection_games: set[int] = set()
+
+        async def send(message: dict) -> None:
+            writer.write((json.dumps(message) + "\n").encode())
+            # Waits if the client is not reading the messages
+            await writer.drain()
+
+        try:
+            while True:
+                line: bytes = await read_request_line(reader)
+                if line is None:
+                    await send({"type": "error", "message": f"A request can have at most {MAX_REQUEST_BYTES} bytes"})
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object")
+                    await self.handle_request(request, send, connection_games)
+                except ValueError as e:
+                    # json.JSONDecodeError is also a ValueError
+                    await send({"type": "error", "message": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in connection_games:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_REQUEST_BYTES)
+        async with server:
+            await server.serve_forever()
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves games over TCP with one JSON message per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Processes searching the moves of the computer (default: number of CPUs)")
+    parser.add_argument("--max-pending-searches", type=int, default=None, help="Searches in the pool at the same time (default: one per worker)")
+    parser.add_argument("--move-timeout", type=float, default=60, help="Seconds a computer player can search one move before it loses the game")
+    parser.add_argument("--game-timeout", type=float, default=600, help="Seconds a computer player can search in a whole game before it loses it")
+    parser.add_argument("--max-games", type=int, default=1000)
+    parser.add_argument("--max-moves", type=int, default=300, help="Moves after which an unfinished game is stopped")
+    parser.add_argument("--opening-book", action="append", default=[], metavar="NAME=PATH", help="Book the clients can choose with its name (can be repeated)")
+    parser.add_argument("--race-table", default=None, help="Table of the race solver, created if it does not exist")
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--max-transposition-table-mb", type=float, default=64)
+    parser.add_argument("--max-iterations", type=int, default=100_000, help="Most iterations of a MCTS player")
+    args = parser.parse_args()
+
+    opening_books: dict[str, str] = {}
+    for book in args.opening_book:
+        name, separator, path = book.partition("=")
+        if not separator:
+            parser.error(f"--opening-book must be NAME=PATH, not {book}")
+        opening_books[name] = path
+
+    async def main() -> None:
+        game_server = GameServer(args.workers, args.max_pending_searches, args.move_timeout, args.max_games, args.max_moves, opening_books,
+                                 args.race_table, args.max_depth, args.max_transposition_table_mb, args.max_iterations, args.game_timeout)
+        try:
+            await game_server.serve(args.host, args.port)
+        finally:
+            game_server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
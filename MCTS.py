@@ -0,0 +1,196 @@
+import math
+import time
+from random import Random
+from concurrent.futures import ProcessPoolExecutor
+from Board import Board
+from Tile import Tile
+from Players import Player, get_move_score_delta
+from SearchStats import SearchStats
+
+"""Monte Carlo Tree Search with UCT. Every iteration goes down the tree choosing the child with the best upper confidence
+bound, adds one new node, plays a rollout from it and adds the result to all the nodes of the path. The moves are kept as
+(origin index, destination index) so the tree does not depend on the Tile objects of one board"""
+
+RANDOM_ROLLOUT: str = "random"
+GREEDY_ROLLOUT: str = "greedy"
+
+"""Node of the tree: the position reached with its move from the position of its parent"""
+class Node():
+    __slots__ = ("move", "parent", "children", "untried_moves", "is_player1_turn", "visits", "wins")
+
+    def __init__(self, move: tuple[int, int], parent, is_player1_turn: bool, untried_moves: list[tuple[int, int]]) -> None:
+        self.move: tuple[int, int] = move
+        self.parent: Node = parent
+        self.children: list[Node] = []
+        self.untried_moves: list[tuple[int, int]] = untried_moves
+        # The player that moves in this position (the one that made the move of the node is the other one)
+        self.is_player1_turn: bool = is_player1_turn
+        self.visits: int = 0
+        # Sum of the results of the rollouts for the player that made the move of the node (1 win, 0 loss)
+        self.wins: float = 0
+
+    """Returns the child with the highest upper confidence bound"""
+    def select_child(self, exploration: float):
+        log_visits: float = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits))
+
+"""Returns the moves of the player as (origin index, destination index), or no moves if the game has ended"""
+def get_index_moves(board: Board, is_player1: bool) -> list[tuple[int, int]]:
+    if board.has_game_ended():
+        return []
+    return [(tile_origin.index, tile_destination.index) for (tile_origin, tile_destination) in board.get_all_player_moves(is_player1)]
+
+"""Returns the result of the position for the player1: 1 if it has won, 0 if it has lost, and if the game has not ended
+1, 0.5 or 0 depending on the sign of the evaluation function"""
+def get_result_for_player1(board: Board, use_eval_func_1: bool) -> float:
+    if board.has_player1_won():
+        return 1
+    if board.has_player2_won():
+        return 0
+    score: int = board.get_score(True, use_eval_func_1)
+    return 1 if score > 0 else (0 if score < 0 else 0.5)
+
+"""Plays at most playout_cap moves from the position (random ones, or with GREEDY_ROLLOUT the ones that increase the score
+the most) and returns the result for the player1. The board is left as it was"""
+def rollout(board: Board, is_player1_turn: bool, random: Random, rollout_policy: str, playout_cap: int, use_eval_func_1: bool) -> float:
+    played: list[tuple[Tile, Tile]] = []
+    for _ in range(playout_cap):
+        if board.has_game_ended():
+            break
+        moves: list[tuple[Tile, Tile]] = board.get_all_player_moves(is_player1_turn)
+        if not moves:
+            break
+        if rollout_policy == GREEDY_ROLLOUT:
+            best_delta: int = max(get_move_score_delta(tile_origin, tile_destination, is_player1_turn, use_eval_func_1) for (tile_origin, tile_destination) in moves)
+            moves = [move for move in moves if get_move_score_delta(move[0], move[1], is_player1_turn, use_eval_func_1) == best_delta]
+        (tile_origin, tile_destination) = random.choice(moves)
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        played.append((tile_origin, tile_destination))
+        is_player1_turn = not is_player1_turn
+
+    result: float = get_result_for_player1(board, use_eval_func_1)
+    for (tile_origin, tile_destination) in reversed(played):
+        board.move_piece_to_tile(tile_destination, tile_origin)
+    return result
+
+"""Searches the position with MCTS until iterations are done or time_limit seconds have passed (whatever happens first,
+at least one iteration). Returns {move of the root: [visits, wins]} and the stats of the search"""
+def mcts_search(board: Board, is_player1_turn: bool, iterations: int = None, time_limit: float = None, exploration: float = 1.4,
+                rollout_policy: str = RANDOM_ROLLOUT, playout_cap: int = 60, use_eval_func_1: bool = True, seed: int = None):
+    start: float = time.monotonic()
+    deadline: float = start + time_limit if time_limit is not None else None
+    random: Random = Random(seed)
+    tiles: list[Tile] = board.board_tiles
+    root: Node = Node(None, None, is_player1_turn, get_index_moves(board, is_player1_turn))
+    stats: SearchStats = SearchStats()
+    max_depth: int = 0
+    iteration: int = 0
+
+    while True:
+        node: Node = root
+        played: list[tuple[int, int]] = []
+
+        # Selection
+        while not node.untried_moves  and  node.children:
+            node = node.select_child(exploration)
+            board.move_piece_to_tile(tiles[node.move[0]], tiles[node.move[1]])
+            played.append(node.move)
+
+        # Expansion
+        if node.untried_moves:
+            move: tuple[int, int] = node.untried_moves.pop(random.randrange(len(node.untried_moves)))
+            board.move_piece_to_tile(tiles[move[0]], tiles[move[1]])
+            played.append(move)
+            child: Node = Node(move, node, not node.is_player1_turn, get_index_moves(board, not node.is_player1_turn))
+            node.children.append(child)
+            node = child
+            stats.nodes += 1
+
+        # Simulation
+        result: float = rollout(board, node.is_player1_turn, random, rollout_policy, playout_cap, use_eval_func_1)
+        stats.leaves += 1
+        max_depth = max(max_depth, len(played))
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            # The result counts for the player that made the move of the node
+            node.wins += (1 - result) if node.is_player1_turn else result
+            node = node.parent
+        for move in reversed(played):
+            board.move_piece_to_tile(tiles[move[1]], tiles[move[0]])
+
+        iteration += 1
+        if iterations is not None  and  iteration >= iterations:
+            break
+        if deadline is not None  and  time.monotonic() >= deadline:
+            break
+        if iterations is None  and  deadline is None:
+            break
+
+    stats.time_per_depth[max_depth] = time.monotonic() - start
+    return {child.move: [child.visits, child.wins] for child in root.children}, stats
+
+class Player_MCTS(Player):
+    """Chooses its moves with Monte Carlo Tree Search, limited by iterations and/or time_per_move (in seconds).
+    With more than one worker, every process grows its own tree from the same position (root parallelization) and the
+    visits and wins of the moves of the root are added before choosing the most visited move"""
+    def __init__(self, name: str, iterations: int = 1000, time_per_move: float = None, exploration: float = 1.4,
+                 rollout_policy: str = RANDOM_ROLLOUT, playout_cap: int = 60, eval_func_int: int = 1, workers: int = 1, seed: int = None) -> None:
+        super().__init__(name)
+        if iterations is None  and  time_per_move is None:
+            raise ValueError("Player_MCTS needs a number of iterations or a time per move")
+        if rollout_policy not in [RANDOM_ROLLOUT, GREEDY_ROLLOUT]:
+            raise ValueError(f"The rollout policy must be {RANDOM_ROLLOUT} or {GREEDY_ROLLOUT}")
+        self.iterations: int = iterations
+        self.time_per_move: float = time_per_move
+        self.exploration: float = exploration
+        self.rollout_policy: str = rollout_policy
+        self.playout_cap: int = playout_cap
+        self.eval_func: int = eval_func_int
+        self.workers: int = workers
+        self.random: Random = Random(seed)
+        self.executor: ProcessPoolExecutor = None
+        self.last_search_stats: SearchStats = SearchStats()
+
+    """Stops the processes of the parallel search"""
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def get_move(self, board: Board) -> tuple[Tile, Tile]:
+        self.last_search_stats = SearchStats()
+        arguments = (self.is_player1(), self.iterations, self.time_per_move, self.exploration, self.rollout_policy, self.playout_cap, self.uses_eval_func_1())
+
+        if self.workers > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            futures = [self.executor.submit(mcts_search, board, *arguments, self.random.getrandbits(64)) for _ in range(self.workers)]
+            results = [future.result() for future in futures]
+        else:
+            results = [mcts_search(board, *arguments, self.random.getrandbits(64))]
+
+        root_moves: dict[tuple[int, int], list] = {}
+        for (moves, stats) in results:
+            self.last_search_stats.merge(stats)
+            for (move, (visits, wins)) in moves.items():
+                move_totals: list = root_moves.setdefault(move, [0, 0])
+                move_totals[0] += visits
+                move_totals[1] += wins
+
+        if not root_moves:
+            return None, None
+        # The most visited move, and among them the one with more wins
+        (origin_index, destination_index) = max(root_moves, key=lambda move: root_moves[move])
+        return board.board_tiles[origin_index], board.board_tiles[destination_index]
+
+    """Counters of the last search: nodes added to the trees, rollouts (leaves) and time (under the deepest depth reached)"""
+    def get_last_search_stats(self) -> SearchStats:
+        return self.last_search_stats
+
+    def get_eval_func(self) -> int:
+        return self.eval_func
+
+    def uses_eval_func_1(self) -> bool:
+        return self.eval_func == 1
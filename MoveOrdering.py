@@ -0,0 +1,52 @@
+from Tile import Tile
+
+"""Orders the moves of the search so the ones that are more likely to produce a cutoff are tried first: the killer moves
+(moves that produced a cutoff in another node of the same depth), then the moves with more history (the sum of depth² of
+all the cutoffs they produced), and then the moves that advance more rows toward the goal triangle (long jumps first)"""
+class MoveOrdering():
+    KILLERS_PER_DEPTH: int = 2
+    NUMBER_OF_TILES: int = 121
+
+    def __init__(self) -> None:
+        # killers[depth] = [(origin index, destination index), ...], the most recent first
+        self.killers: dict[int, list[tuple[int, int]]] = {}
+        # history[origin index * NUMBER_OF_TILES + destination index]
+        self.history: list[int] = [0] * (MoveOrdering.NUMBER_OF_TILES * MoveOrdering.NUMBER_OF_TILES)
+
+    """Forgets the killers and halves the history, so the counters of older searches weigh less"""
+    def new_search(self) -> None:
+        self.killers.clear()
+        self.history = [h // 2 for h in self.history]
+
+    def clear(self) -> None:
+        self.killers.clear()
+        self.history = [0] * (MoveOrdering.NUMBER_OF_TILES * MoveOrdering.NUMBER_OF_TILES)
+
+    """Records that the move produced a cutoff at the depth"""
+    def add_cutoff(self, tile_origin: Tile, tile_destination: Tile, depth: int) -> None:
+        move: tuple[int, int] = (tile_origin.index, tile_destination.index)
+        killers: list[tuple[int, int]] = self.killers.setdefault(depth, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[MoveOrdering.KILLERS_PER_DEPTH:]
+
+        self.history[move[0] * MoveOrdering.NUMBER_OF_TILES + move[1]] += depth * depth
+
+    def get_history(self, tile_origin: Tile, tile_destination: Tile) -> int:
+        return self.history[tile_origin.index * MoveOrdering.NUMBER_OF_TILES + tile_destination.index]
+
+    """Returns the moves sorted from the most to the least promising (moves with the same priority keep their order)"""
+    def order_moves(self, moves: list[tuple[Tile, Tile]], depth: int, is_player1: bool) -> list[tuple[Tile, Tile]]:
+        killers: list[tuple[int, int]] = self.killers.get(depth, [])
+        history: list[int] = self.history
+        # The player1 goes down to the bottom triangle and the player2 up to the top one
+        direction: int = 1 if is_player1 else -1
+
+        def priority(move: tuple[Tile, Tile]) -> tuple[int, int, int]:
+            (tile_origin, tile_destination) = move
+            index: tuple[int, int] = (tile_origin.index, tile_destination.index)
+            killer_rank: int = MoveOrdering.KILLERS_PER_DEPTH - killers.index(index) if index in killers else 0
+            return (killer_rank, history[index[0] * MoveOrdering.NUMBER_OF_TILES + index[1]], (tile_destination.row - tile_origin.row) * direction)
+
+        return sorted(moves, key=priority, reverse=True)
@@ -0,0 +1,194 @@
+import argparse
+import mmap
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from Board import Board
+from Tile import Tile
+from Players import minimax_pruning, accept_all_moves
+from Game import get_heuristic
+from GameRecord import read_records, replay_record
+from Symmetry import get_canonical_key, transform_index
+
+"""Book of precomputed moves for the first positions of the game, stored in a binary file sorted by the Zobrist hash of the
+canonical position (see get_book_key), so symmetric positions share one entry. The file is memory-mapped, so many processes can share the same book and only
+the pages that are read are loaded in memory"""
+class OpeningBook():
+    MAGIC: bytes = b"CCBOOK01"
+    VERSION: int = 2
+    # magic, version, evaluation function (0 if built from games), depth of the search (0 if built from games), number of entries
+    HEADER: struct.Struct = struct.Struct("<8sHBBI")
+    # key, origin index, destination index, score, depth of the search (0 if built from games)
+    ENTRY: struct.Struct = struct.Struct("<QBBiH")
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.file = open(path, "rb")
+        self.data: mmap.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.eval_func, self.depth, self.number_of_entries) = OpeningBook.HEADER.unpack_from(self.data, 0)
+        if magic != OpeningBook.MAGIC  or  version != OpeningBook.VERSION:
+            raise ValueError(f"{path} is not an opening book of version {OpeningBook.VERSION}")
+
+    # Only the path is sent to other processes, each one maps the file again
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def get_entry(self, i: int) -> tuple[int, int, int, int, int]:
+        return OpeningBook.ENTRY.unpack_from(self.data, OpeningBook.HEADER.size + i * OpeningBook.ENTRY.size)
+
+    """Returns the (key, origin index, destination index, score, depth) stored for the key, or None if it is not in the book"""
+    def probe(self, key: int):
+        # Binary search over the sorted entries
+        low, high = 0, self.number_of_entries
+        while low < high:
+            middle: int = (low + high) // 2
+            entry = self.get_entry(middle)
+            if entry[0] < key:
+                low = middle + 1
+            elif entry[0] > key:
+                high = middle
+            else:
+                return entry
+        return None
+
+    """Returns the move of the book for the player in this position, or None if the position is not in the book"""
+    def get_move(self, board: Board, is_player1: bool) -> tuple[Tile, Tile]:
+        key, symmetry = get_book_key(board, is_player1, self.eval_func)
+        entry = self.probe(key)
+        if entry is None:
+            return None
+
+        # The move is stored for the canonical position
+        move: tuple[Tile, Tile] = (board.board_tiles[transform_index(entry[1], symmetry)], board.board_tiles[transform_index(entry[2], symmetry)])
+        # Protect against hash collisions: the move must be valid in this position
+        if move not in board.get_all_player_moves(is_player1):
+            return None
+        return move
+
+"""Returns (key, symmetry): the key of the position in a book and the symmetry that takes it to the canonical position, where
+the moves of the book are stored. The rotation that swaps the players is only used when the scores of the book do not
+depend on it, which is not the case for the evaluation function 2"""
+def get_book_key(board: Board, is_player1_turn: bool, eval_func: int) -> tuple[int, int]:
+    return get_canonical_key(board, is_player1_turn, eval_func != 2)
+
+"""Writes the entries {key: (origin index, destination index, score, depth)} sorted by key"""
+def write_book(path: str, entries: dict, eval_func: int, depth: int) -> None:
+    with open(path, "wb") as output:
+        output.write(OpeningBook.HEADER.pack(OpeningBook.MAGIC, OpeningBook.VERSION, eval_func, depth, len(entries)))
+        for key in sorted(entries):
+            (origin_index, destination_index, score, entry_depth) = entries[key]
+            output.write(OpeningBook.ENTRY.pack(key, origin_index, destination_index, score, entry_depth))
+
+"""Returns the positions (player1 mask, player2 mask, is player1 turn) reached with up to plies moves from the start,
+with any of the two players starting. Only one position of every group of symmetric positions is returned"""
+def get_opening_positions(plies: int, eval_func: int) -> list[tuple[int, int, bool]]:
+    board = Board()
+    positions: dict[int, tuple[int, int, bool]] = {}
+
+    def explore(remaining_plies: int, is_player1_turn: bool) -> None:
+        key, _ = get_book_key(board, is_player1_turn, eval_func)
+        if key in positions  or  board.has_game_ended():
+            return
+        positions[key] = (*board.get_player_masks(), is_player1_turn)
+        if remaining_plies == 0:
+            return
+        for (tile_origin, tile_destination) in board.get_all_player_moves(is_player1_turn):
+            board.move_piece_to_tile(tile_origin, tile_destination)
+            explore(remaining_plies - 1, not is_player1_turn)
+            board.move_piece_to_tile(tile_destination, tile_origin)
+
+    explore(plies, True)
+    explore(plies, False)
+    return list(positions.values())
+
+"""Searches the best move of one position. Returns (key, (origin index, destination index, score, depth))"""
+def search_position(position: tuple[int, int, bool], depth: int, eval_func: int, use_heuristic: bool):
+    (player1_mask, player2_mask, is_player1_turn) = position
+    board = Board()
+    board.set_player_masks(player1_mask, player2_mask)
+    heuristic = get_heuristic(board, is_player1_turn) if use_heuristic else accept_all_moves
+    score, tile_origin, tile_destination = minimax_pruning(board, depth, is_player1_turn, heuristic, eval_func == 1, skip_mirrored_moves=True)
+    key, symmetry = get_book_key(board, is_player1_turn, eval_func)
+    if tile_origin is None:
+        return key, None
+    return key, (transform_index(tile_origin.index, symmetry), transform_index(tile_destination.index, symmetry), int(score), depth)
+
+"""Builds a book searching at the depth every position reached within plies moves from the start"""
+def build_from_search(path: str, plies: int, depth: int, eval_func: int, use_heuristic: bool = False, workers: int = None) -> int:
+    positions = get_opening_positions(plies, eval_func)
+    entries: dict = {}
+    with ProcessPoolExecutor(workers) as executor:
+        for (key, entry) in executor.map(search_position, positions, [depth] * len(positions), [eval_func] * len(positions),
+                                         [use_heuristic] * len(positions), chunksize=8):
+            if entry is not None:
+                entries[key] = entry
+    write_book(path, entries, eval_func, depth)
+    return len(entries)
+
+"""Builds a book from recorded games (one JSON object per line with "first_player", "moves" and "result", like Tournament.py
+writes them). For the first plies of every game, the move with the best results for the player that made it is chosen among
+the moves played at least min_games times. The score is the percentage of points (a win is 1, an unfinished game 0.5)"""
+def build_from_games(path: str, records_path: str, plies: int, min_games: int = 1, eval_func: int = 0) -> int:
+    # results[key][(origin, destination)] = [points, games]
+    results: dict[int, dict[tuple[int, int], list]] = {}
+    for (_, record) in read_records(records_path):
+        for (ply, (board, is_player1_turn, origin_index, destination_index)) in enumerate(replay_record(record)):
+            if ply >= plies:
+                break
+            key, symmetry = get_book_key(board, is_player1_turn, eval_func)
+            if record["result"] in ["player1", "player2"]:
+                points: float = 1.0 if (record["result"] == "player1") == is_player1_turn else 0.0
+            else:
+                points: float = 0.5
+            move: tuple[int, int] = (transform_index(origin_index, symmetry), transform_index(destination_index, symmetry))
+            move_results = results.setdefault(key, {}).setdefault(move, [0.0, 0])
+            move_results[0] += points
+            move_results[1] += 1
+
+    entries: dict = {}
+    for (key, moves) in results.items():
+        candidates = [(points / games, games, move) for (move, (points, games)) in moves.items() if games >= min_games]
+        if candidates:
+            (rate, games, (origin_index, destination_index)) = max(candidates)
+            entries[key] = (origin_index, destination_index, round(rate * 100), 0)
+    write_book(path, entries, eval_func, 0)
+    return len(entries)
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds or inspects an opening book")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Build the book searching every position of the opening")
+    search_parser.add_argument("--plies", type=int, default=2)
+    search_parser.add_argument("--depth", type=int, default=4)
+    search_parser.add_argument("--eval-func", type=int, choices=[1, 2], default=1)
+    search_parser.add_argument("--heuristic", action="store_true")
+    search_parser.add_argument("--workers", type=int, default=None)
+    search_parser.add_argument("--output", default="book.bin")
+
+    games_parser = subparsers.add_parser("games", help="Build the book from recorded games")
+    games_parser.add_argument("records")
+    games_parser.add_argument("--plies", type=int, default=10)
+    games_parser.add_argument("--min-games", type=int, default=1)
+    games_parser.add_argument("--output", default="book.bin")
+
+    info_parser = subparsers.add_parser("info", help="Show the header of a book")
+    info_parser.add_argument("book")
+
+    args = parser.parse_args()
+    if args.command == "search":
+        print(f"{build_from_search(args.output, args.plies, args.depth, args.eval_func, args.heuristic, args.workers)} positions written to {args.output}")
+    elif args.command == "games":
+        print(f"{build_from_games(args.output, args.records, args.plies, args.min_games)} positions written to {args.output}")
+    else:
+        book = OpeningBook(args.book)
+        print(f"{book.number_of_entries} positions, evaluation function {book.eval_func}, depth {book.depth}")
@@ -3,8 +3,15 @@ class Piece():
     PLAYER1_COLOR: str = "O"
     PLAYER2_COLOR: str = "X"
 
+    # Owner of the piece, compared as an integer instead of comparing the colors
+    PLAYER1: int = 1
+    PLAYER2: int = 2
+
+    __slots__ = ("color", "owner")
+
     def __init__(self, color: str) -> None:
         self.color: str = color
+        self.owner: int = Piece.PLAYER1 if color == Piece.PLAYER1_COLOR else Piece.PLAYER2
         
     def __str__(self) -> str:
         return self.get_color()
@@ -12,8 +19,11 @@ class Piece():
     def get_color(self) -> str:
         return self.color
     
+    def get_owner(self) -> int:
+        return self.owner
+
     def is_player2_piece(self) -> bool:
-        return self.color == Piece.PLAYER2_COLOR
+        return self.owner == Piece.PLAYER2
         
     def is_player1_piece(self) -> bool:
-        return self.color == Piece.PLAYER1_COLOR
+        return self.owner == Piece.PLAYER1
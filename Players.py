@@ -1,5 +1,12 @@
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from Board import Board
 from Tile import Tile
+from TranspositionTable import TranspositionTable
+from SearchStats import SearchStats
+from MoveOrdering import MoveOrdering
+from Symmetry import get_canonical_key, remove_mirrored_moves, PERMUTATIONS
 
 CHARACTERS = "123456789ABCDEFGHJKLMNPQRSTUVWXYZ"
 
@@ -30,47 +37,318 @@ def ask_person_for_tile_destination(board: Board, tile_origin: Tile) -> Tile:
             destination_tile = available_tile_destinations[ CHARACTERS.index(n) ]
             return destination_tile
 
-def minimax_pruning(board: Board, depth: int, is_player1_turn: bool, heuristic, use_eval_func_1, maximizing: bool = True, alpha: int = -1_000_000_000, beta: int = 1_000_000_000) -> tuple[int, Tile, Tile]:
-    if depth==0 or board.has_game_ended():
-        # We add the depth as an incentive to choose the branch that is shorter
-        return board.get_score(is_player1_turn, use_eval_func_1)+depth, None, None
-    
+"""Raised inside the search when its deadline has passed or it has searched all the nodes of its budget"""
+class SearchTimeout(Exception):
+    pass
+
+"""Returns how much the score of the player increases with the move: the score of the destination minus the one of the origin"""
+def get_move_score_delta(tile_origin: Tile, tile_destination: Tile, is_player1: bool, use_eval_func_1: bool) -> int:
+    if use_eval_func_1:
+        scores: tuple[int, ...] = tile_origin.topology.score1_for_player1 if is_player1 else tile_origin.topology.score1_for_player2
+    else:
+        scores: tuple[int, ...] = tile_origin.topology.score2_for_player1 if is_player1 else tile_origin.topology.score2_for_player2
+    return scores[tile_destination.index] - scores[tile_origin.index]
+
+"""Keeps the beam_width moves with the highest score delta, best first (moves with the same delta keep their order).
+At least one move is always kept, so the beam never leaves a player without moves"""
+def select_beam_moves(moves: list[tuple[Tile, Tile]], beam_width: int, is_player1: bool, use_eval_func_1: bool) -> list[tuple[Tile, Tile]]:
+    moves = sorted(moves, key=lambda move: get_move_score_delta(move[0], move[1], is_player1, use_eval_func_1), reverse=True)
+    return moves[ : max(1, beam_width)]
+
+"""Returns the beam widths of the children of a node: the widths are given per ply and the last one is used for the deeper plies"""
+def get_child_beam_widths(beam_widths: list[int]) -> list[int]:
+    if beam_widths is None  or  len(beam_widths) <= 1:
+        return beam_widths
+    return beam_widths[1:]
+
+"""Returns a list with all the (origin, destination) moves of the player, starting with the first_move if it is given.
+With a beam_width (> 0) only that number of moves is returned, the ones with the highest score delta.
+With a move_ordering the rest of the moves are sorted by it for the depth"""
+def generate_moves(board: Board, is_player1: bool, heuristic, first_move: tuple[Tile, Tile] = None, beam_width: int = None, use_eval_func_1: bool = True,
+                   move_ordering: MoveOrdering = None, depth: int = 0) -> list[tuple[Tile, Tile]]:
+    moves: list[tuple[Tile, Tile]] = board.get_all_player_moves(is_player1, None if heuristic is accept_all_moves else heuristic)
+    if beam_width  and  len(moves) > beam_width:
+        moves = select_beam_moves(moves, beam_width, is_player1, use_eval_func_1)
+    if move_ordering is not None:
+        moves = move_ordering.order_moves(moves, depth, is_player1)
+    if first_move is not None  and  first_move in moves:
+        moves.remove(first_move)
+        moves.insert(0, first_move)
+    return moves
+
+"""Returns the score of a leaf for the player that moves in it: the score of the player of the root plus the remaining
+depth (an incentive to choose the branch that is shorter), negated if the other player moves"""
+def get_leaf_score(board: Board, depth: int, is_player1_turn: bool, is_player1_moving: bool, use_eval_func_1: bool) -> int:
+    score: int = board.get_score(is_player1_turn, use_eval_func_1) + depth
+    return score if is_player1_moving == is_player1_turn else -score
+
+"""Negamax search with alpha-beta pruning and principal variation search. The scores are for the player that moves in the
+node (is_player1_moving), and is_player1_turn is the player of the root, whose score is the one of the leaves.
+The first move of every node is searched with the window (alpha, beta) and the rest with a null window (alpha, alpha + 1)
+that only proves they are not better; a move that turns out to be better is searched again with the whole window.
+Returns (score, origin, destination) failing soft (the score can be outside the window). A player without moves is scored
+like a leaf, and if the heuristic leaves a player without moves all its moves are searched.
+With max_nodes the search stops (raising SearchTimeout) once stats counts more nodes, so it needs the stats"""
+def negamax(board: Board, depth: int, is_player1_turn: bool, is_player1_moving: bool, heuristic, use_eval_func_1: bool, alpha: int, beta: int,
+            transposition_table: TranspositionTable = None, deadline: float = None, stats: SearchStats = None, beam_widths: list[int] = None,
+            move_ordering: MoveOrdering = None, skip_mirrored_moves: bool = False, max_nodes: int = None) -> tuple[int, Tile, Tile]:
+    if deadline is not None  and  time.monotonic() > deadline:
+        raise SearchTimeout()
+    if stats is not None:
+        stats.nodes += 1
+        stats.game_ended_checks += depth != 0
+        if max_nodes is not None  and  stats.nodes > max_nodes:
+            raise SearchTimeout()
+
+    if depth == 0  or  board.has_game_ended():
+        if stats is not None:
+            stats.leaves += 1
+        return get_leaf_score(board, depth, is_player1_turn, is_player1_moving, use_eval_func_1), None, None
+
+    tt_move: tuple[Tile, Tile] = None
+    if transposition_table is not None:
+        # A position and its mirrored position share the entry, which keeps the move of the canonical position
+        key, symmetry = get_canonical_key(board, is_player1_moving)
+        permutation: tuple[int, ...] = PERMUTATIONS[symmetry]
+        entry = transposition_table.probe(key)
+        if entry is not None:
+            (_, entry_depth, entry_score, entry_bound, origin_index, destination_index, _) = entry
+            if origin_index is not None:
+                tt_move = board.board_tiles[permutation[origin_index]], board.board_tiles[permutation[destination_index]]
+            # Scores include the remaining depth, so they can only be reused at the same depth
+            if entry_depth == depth:
+                if entry_bound == TranspositionTable.EXACT  or  (entry_bound == TranspositionTable.LOWER_BOUND  and  entry_score >= beta)  or  (entry_bound == TranspositionTable.UPPER_BOUND  and  entry_score <= alpha):
+                    return entry_score, *(tt_move if tt_move is not None else (None, None))
+        original_alpha: int = alpha
+
+    # Forward pruning: only the best moves by score delta are searched (all of them without beam_widths or with a width of 0)
+    beam_width: int = beam_widths[0] if beam_widths else None
+    child_beam_widths: list[int] = get_child_beam_widths(beam_widths)
+
+    moves: list[tuple[Tile, Tile]] = generate_moves(board, is_player1_moving, heuristic, tt_move, beam_width, use_eval_func_1, move_ordering, depth)
+    if not moves  and  heuristic is not accept_all_moves:
+        moves = generate_moves(board, is_player1_moving, accept_all_moves, tt_move, beam_width, use_eval_func_1, move_ordering, depth)
+    if not moves:
+        if stats is not None:
+            stats.leaves += 1
+        return get_leaf_score(board, depth, is_player1_turn, is_player1_moving, use_eval_func_1), None, None
+    if skip_mirrored_moves:
+        # In a mirror symmetric position a move and its mirrored move have the same score (checked only where it is asked, the root)
+        moves = remove_mirrored_moves(board, moves)
+
+    if stats is not None:
+        stats.internal_nodes += 1
+
+    best_score, better_origin, better_destination = float('-inf'), None, None
+    for (move_index, (tile_origin, tile_destination)) in enumerate(moves):
+        if stats is not None:
+            stats.moves_searched += 1
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        try:
+            # Near the leaves a null window saves less than the searches repeated for the moves that are better
+            if move_index == 0  or  depth <= 2:
+                score: int = -negamax(board, depth-1, is_player1_turn, not is_player1_moving, heuristic, use_eval_func_1, -beta, -alpha,
+                                      transposition_table, deadline, stats, child_beam_widths, move_ordering, max_nodes=max_nodes)[0]
+            else:
+                score: int = -negamax(board, depth-1, is_player1_turn, not is_player1_moving, heuristic, use_eval_func_1, -alpha-1, -alpha,
+                                      transposition_table, deadline, stats, child_beam_widths, move_ordering, max_nodes=max_nodes)[0]
+                if alpha < score < beta:
+                    # Better than the first move: its exact score needs the whole window
+                    if stats is not None:
+                        stats.researches += 1
+                    score = -negamax(board, depth-1, is_player1_turn, not is_player1_moving, heuristic, use_eval_func_1, -beta, -alpha,
+                                     transposition_table, deadline, stats, child_beam_widths, move_ordering, max_nodes=max_nodes)[0]
+        finally:
+            # Undo the move even if the search is aborted
+            board.move_piece_to_tile(tile_destination, tile_origin)
+
+        # The first move with the best score is chosen
+        if score > best_score:
+            best_score, better_origin, better_destination = score, tile_origin, tile_destination
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            if stats is not None:
+                stats.add_cutoff(move_index)
+            if move_ordering is not None:
+                move_ordering.add_cutoff(tile_origin, tile_destination, depth)
+            break
+
+    if transposition_table is not None:
+        if best_score <= original_alpha:
+            bound = TranspositionTable.UPPER_BOUND
+        elif best_score >= beta:
+            bound = TranspositionTable.LOWER_BOUND
+        else:
+            bound = TranspositionTable.EXACT
+        transposition_table.store(key, depth, best_score, bound, permutation[better_origin.index], permutation[better_destination.index])
+
+    return best_score, better_origin, better_destination
+
+"""Searches the position with negamax and returns (score, origin, destination) with the score for the player of the root
+(is_player1_turn). With maximizing False the position is searched for the opponent, who moves in it, as if it was the
+node below the root: the score is still the one of the player of the root, and alpha and beta are bounds of that score"""
+def minimax_pruning(board: Board, depth: int, is_player1_turn: bool, heuristic, use_eval_func_1, maximizing: bool = True, alpha: int = -1_000_000_000, beta: int = 1_000_000_000, transposition_table: TranspositionTable = None, deadline: float = None, stats: SearchStats = None, beam_widths: list[int] = None, move_ordering: MoveOrdering = None, skip_mirrored_moves: bool = False, max_nodes: int = None) -> tuple[int, Tile, Tile]:
     if maximizing:
-        max_points, better_origin, better_destination = float('-inf'), None, None
-        for tile_origin in board.get_player1_tiles() if is_player1_turn else board.get_player2_tiles():
-            for tile_destination in board.get_all_valid_logical_moves(tile_origin, heuristic):
-                board.move_piece_to_tile(tile_origin, tile_destination)
-                res_points, _1, _2 = minimax_pruning(board, depth-1, is_player1_turn, heuristic, use_eval_func_1, not maximizing, alpha, beta)
-                board.move_piece_to_tile(tile_destination, tile_origin)
-
-                if res_points > max_points:
-                    max_points, better_origin, better_destination = res_points, tile_origin, tile_destination
-                alpha = max(alpha, res_points)
-                if beta <= alpha:
-                    break
+        return negamax(board, depth, is_player1_turn, is_player1_turn, heuristic, use_eval_func_1, alpha, beta, transposition_table, deadline,
+                       stats, beam_widths, move_ordering, skip_mirrored_moves, max_nodes)
+    score, tile_origin, tile_destination = negamax(board, depth, is_player1_turn, not is_player1_turn, heuristic, use_eval_func_1, -beta, -alpha,
+                                                   transposition_table, deadline, stats, beam_widths, move_ordering, skip_mirrored_moves, max_nodes)
+    return -score, tile_origin, tile_destination
 
-            if beta <= alpha:
-                break
+"""Heuristic that accepts every move. It is a module function (not a lambda) so it can be sent to other processes"""
+def accept_all_moves(tile_origin: Tile, tile_destination: Tile) -> bool:
+    return True
 
-        return max_points, better_origin, better_destination
-    
-    else:
-        min_points, better_origin, better_destination = float('inf'), None, None
-        for tile_origin in board.get_player2_tiles() if is_player1_turn else board.get_player1_tiles():
-            for tile_destination in board.get_all_valid_logical_moves(tile_origin, heuristic):
-                board.move_piece_to_tile(tile_origin, tile_destination)
-                res_points, _1, _2 = minimax_pruning(board, depth-1, is_player1_turn, heuristic, use_eval_func_1, not maximizing, alpha, beta)
-                board.move_piece_to_tile(tile_destination, tile_origin)
-
-                if res_points < min_points:
-                    min_points, better_origin, better_destination = res_points, tile_origin, tile_destination
-                beta = min(beta, res_points)
-                if beta <= alpha:
-                    break
-            
-            if beta <= alpha:
+"""Returns the principal variation that starts with the move: the move followed by the moves stored in the transposition
+table for the positions it leads to, at most depth moves. It stops where the table has no move or the move is not valid
+(its entry was replaced by another position)"""
+def get_principal_variation(board: Board, move: tuple[Tile, Tile], is_player1_moving: bool, depth: int, transposition_table: TranspositionTable) -> list[tuple[Tile, Tile]]:
+    variation: list[tuple[Tile, Tile]] = [move]
+    board.move_piece_to_tile(*move)
+    try:
+        is_player1_moving = not is_player1_moving
+        while len(variation) < depth  and  not board.has_game_ended():
+            key, symmetry = get_canonical_key(board, is_player1_moving)
+            entry = transposition_table.probe(key)
+            if entry is None  or  entry[4] is None:
                 break
-        return min_points, better_origin, better_destination
+            next_move: tuple[Tile, Tile] = board.board_tiles[PERMUTATIONS[symmetry][entry[4]]], board.board_tiles[PERMUTATIONS[symmetry][entry[5]]]
+            if next_move not in board.get_all_player_moves(is_player1_moving):
+                break
+            board.move_piece_to_tile(*next_move)
+            variation.append(next_move)
+            is_player1_moving = not is_player1_moving
+    finally:
+        for (tile_origin, tile_destination) in reversed(variation):
+            board.move_piece_to_tile(tile_destination, tile_origin)
+    return variation
+
+"""Searches the moves of the root at the depth and returns the number_of_lines best ones as (score, principal variation),
+best first. Once there are enough lines every move is searched with the score of the last line as alpha, so a move that
+can not enter the lines is only proven worse, like in alpha-beta, and only the moves of the lines get an exact score.
+A move with the same score as a line does not replace it, so the first moves keep their place"""
+def search_multi_pv_depth(board: Board, root_moves: list[tuple[Tile, Tile]], depth: int, is_player1_turn: bool, heuristic, use_eval_func_1: bool,
+                          number_of_lines: int, transposition_table: TranspositionTable, deadline: float = None, max_nodes: int = None,
+                          stats: SearchStats = None, beam_widths: list[int] = None, move_ordering: MoveOrdering = None) -> list[tuple[int, list[tuple[Tile, Tile]]]]:
+    child_beam_widths: list[int] = get_child_beam_widths(beam_widths)
+    lines: list[tuple[int, list[tuple[Tile, Tile]]]] = []
+    for (tile_origin, tile_destination) in root_moves:
+        alpha: int = lines[-1][0] if len(lines) == number_of_lines else -1_000_000_000
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        try:
+            score: int = -negamax(board, depth-1, is_player1_turn, not is_player1_turn, heuristic, use_eval_func_1, -1_000_000_000, -alpha,
+                                  transposition_table, deadline, stats, child_beam_widths, move_ordering, max_nodes=max_nodes)[0]
+        finally:
+            board.move_piece_to_tile(tile_destination, tile_origin)
+
+        if score > alpha:
+            # The variation is read now, before the searches of the next moves replace its entries
+            variation: list[tuple[Tile, Tile]] = get_principal_variation(board, (tile_origin, tile_destination), is_player1_turn, depth, transposition_table)
+            position: int = sum(1 for (line_score, _) in lines if line_score >= score)
+            lines.insert(position, (score, variation))
+            del lines[number_of_lines : ]
+    return lines
+
+"""Multi-PV search: finds the number_of_lines best moves of the position in a single search, instead of one search per move.
+Returns (depth, lines) with the deepest depth completed and the lines best first, each one (score, principal variation):
+the score of minimax_pruning for the player of the root and a list of (origin, destination) that starts with the move.
+The depths are searched one after the other up to depth, sharing the transposition table (one is created if none is given),
+and every depth searches first the moves of the lines of the previous one. The search stops at the deadline or after
+max_nodes nodes (counted in stats) and returns the lines of the last depth completed; the depth 1 is always completed.
+In a mirror symmetric position only one of a move and its mirrored move is returned"""
+def search_multi_pv(board: Board, depth: int, is_player1_turn: bool, heuristic, use_eval_func_1: bool, number_of_lines: int = 3,
+                    transposition_table: TranspositionTable = None, deadline: float = None, max_nodes: int = None, stats: SearchStats = None,
+                    beam_widths: list[int] = None, move_ordering: MoveOrdering = None) -> tuple[int, list[tuple[int, list[tuple[Tile, Tile]]]]]:
+    if transposition_table is None:
+        # The principal variations are read from the table
+        transposition_table = TranspositionTable(Player_Computer.TIME_CONTROL_TRANSPOSITION_TABLE_MB)
+    if stats is None:
+        stats = SearchStats()
+    if board.has_game_ended():
+        return 0, []
+
+    beam_width: int = beam_widths[0] if beam_widths else None
+    root_moves: list[tuple[Tile, Tile]] = generate_moves(board, is_player1_turn, heuristic, None, beam_width, use_eval_func_1, move_ordering, depth)
+    if not root_moves  and  heuristic is not accept_all_moves:
+        root_moves = generate_moves(board, is_player1_turn, accept_all_moves, None, beam_width, use_eval_func_1, move_ordering, depth)
+    root_moves = remove_mirrored_moves(board, root_moves)
+
+    completed_depth: int = 0
+    lines: list[tuple[int, list[tuple[Tile, Tile]]]] = []
+    for current_depth in range(1, depth + 1):
+        depth_start: float = time.monotonic()
+        try:
+            # The depth 1 always finishes, so there are always lines to return
+            current_lines = search_multi_pv_depth(board, root_moves, current_depth, is_player1_turn, heuristic, use_eval_func_1, number_of_lines,
+                                                  transposition_table, None if current_depth == 1 else deadline, None if current_depth == 1 else max_nodes,
+                                                  stats, beam_widths, move_ordering)
+        except SearchTimeout:
+            stats.time_per_depth[current_depth] = time.monotonic() - depth_start
+            break
+        stats.time_per_depth[current_depth] = time.monotonic() - depth_start
+        completed_depth, lines = current_depth, current_lines
+
+        line_moves: list[tuple[Tile, Tile]] = [variation[0] for (_, variation) in lines]
+        root_moves = line_moves + [move for move in root_moves if move not in line_moves]
+        if deadline is not None  and  time.monotonic() >= deadline:
+            break
+    return completed_depth, lines
+
+# State of each process of the parallel search, set by init_search_worker
+worker_shared_alpha = None
+worker_transposition_table: TranspositionTable = None
+worker_search_id: int = None
+worker_move_ordering: MoveOrdering = None
+
+"""Initializes a process of the parallel search with the alpha shared by all processes and its own transposition table and move ordering"""
+def init_search_worker(shared_alpha, transposition_table_mb: float, replacement_policy: str, use_move_ordering: bool = False) -> None:
+    global worker_shared_alpha, worker_transposition_table, worker_move_ordering
+    worker_shared_alpha = shared_alpha
+    worker_transposition_table = TranspositionTable(transposition_table_mb, replacement_policy) if transposition_table_mb > 0 else None
+    worker_move_ordering = MoveOrdering() if use_move_ordering else None
+
+"""Searches the move in the root of the parallel search and returns its score (None if the deadline passed) and the stats of the search.
+The search uses as alpha the best score already found by any process (minus one, so a move with the same score is still
+scored exactly and ties are broken like in the serial search), and shares its score if it is better"""
+def search_root_move(board: Board, heuristic, origin_index: int, destination_index: int, depth: int, is_player1_turn: bool, use_eval_func_1: bool, search_id: int, deadline: float = None, beam_widths: list[int] = None):
+    global worker_search_id
+    if worker_search_id != search_id:
+        if worker_transposition_table is not None:
+            worker_transposition_table.new_search()
+        if worker_move_ordering is not None:
+            worker_move_ordering.new_search()
+    worker_search_id = search_id
+
+    alpha = worker_shared_alpha.value
+    alpha = alpha - 1 if alpha > -1_000_000_000 else alpha
+
+    stats: SearchStats = SearchStats()
+    tile_origin, tile_destination = board.board_tiles[origin_index], board.board_tiles[destination_index]
+    board.move_piece_to_tile(tile_origin, tile_destination)
+    try:
+        points, _1, _2 = minimax_pruning(board, depth-1, is_player1_turn, heuristic, use_eval_func_1, False, alpha, 1_000_000_000, worker_transposition_table, deadline, stats, get_child_beam_widths(beam_widths), worker_move_ordering)
+    except SearchTimeout:
+        return None, stats
+
+    if points > alpha:
+        # The score is exact, the other processes can use it as alpha
+        with worker_shared_alpha.get_lock():
+            worker_shared_alpha.value = max(worker_shared_alpha.value, points)
+    return points, stats
+
+"""Searches in a background process the position expected after the reply of the opponent, and sends through the connection
+the (origin index, destination index, stats) of the best move found"""
+def ponder_search(connection, board: Board, depth: int, is_player1_turn: bool, heuristic, use_eval_func_1: bool, transposition_table_mb: float,
+                  beam_widths: list[int], use_move_ordering: bool) -> None:
+    stats: SearchStats = SearchStats()
+    start: float = time.monotonic()
+    _, tile_origin, tile_destination = minimax_pruning(board, depth, is_player1_turn, heuristic, use_eval_func_1,
+                                                       transposition_table=TranspositionTable(transposition_table_mb) if transposition_table_mb > 0 else None,
+                                                       stats=stats, beam_widths=beam_widths, move_ordering=MoveOrdering() if use_move_ordering else None,
+                                                       skip_mirrored_moves=True)
+    stats.time_per_depth[depth] = time.monotonic() - start
+    connection.send((None if tile_origin is None else tile_origin.index, None if tile_destination is None else tile_destination.index, stats))
+    connection.close()
 
 class Player():
     def __init__(self, name: str) -> None:
@@ -84,22 +362,334 @@ class Player():
 
 
 class Player_Computer(Player):
-    DEFAULT_HEURISTIC = lambda x, y: True
-    def __init__(self, name: str, eval_func_int: int, depth: int) -> None:
+    DEFAULT_HEURISTIC = staticmethod(accept_all_moves)
+    # Size of the transposition table created when there is a time limit but no table was requested
+    TIME_CONTROL_TRANSPOSITION_TABLE_MB: float = 8
+    # Number of moves still to play assumed when dividing the time left for the game
+    EXPECTED_MOVES_LEFT: int = 30
+    # Fraction of the time for the move that a ponder hit waits for the pondering to finish, the rest is left for a search
+    PONDER_WAIT_FRACTION: float = 0.5
+    # Fraction of the time for the move that the race solver may use, the rest is left for a search if it gives up
+    RACE_SOLVER_TIME_FRACTION: float = 0.25
+    # Half the width of the aspiration window of the iterative deepening, for each evaluation function (the scores of
+    # consecutive depths usually differ by less)
+    ASPIRATION_WINDOW_EVAL_1: int = 8
+    ASPIRATION_WINDOW_EVAL_2: int = 80
+
+    """With time_per_move and/or time_per_game (in seconds) the search deepens iteratively up to depth until the time runs out.
+    With more than one worker the moves of the root are searched in parallel by that number of processes.
+    The stats_hook, if given, is called as stats_hook(player, stats) with the SearchStats of every move.
+    With an opening_book (OpeningBook) its moves are played while the position is in the book. A book built by
+    searching must have been built with the same evaluation function as the player (ValueError otherwise)
+    With beam_widths only the best beam_widths[i] moves by score delta are searched at the ply i from the root (the last
+    width is used for the deeper plies, and 0 searches all the moves), so the search reaches more depth in the same time.
+    With move_ordering the moves are ordered with killer moves, a history table and their advance toward the goal, which
+    gives more cutoffs (among moves with the same score, the chosen one may then be different).
+    With ponder, after every move the player predicts the reply of the opponent and searches the resulting position in a
+    background process while the opponent thinks. If the opponent makes the predicted move (a ponder hit) that search is
+    used, otherwise it is stopped and the position is searched as usual.
+    With a race_solver (RaceSolver), once the pieces of both players have passed each other its exact moves are played
+    instead of searching, if it solves the position within its node budget and RACE_SOLVER_TIME_FRACTION of the time for
+    the move. The positions it solved are saved to its table file when the player is closed"""
+    def __init__(self, name: str, eval_func_int: int, depth: int, transposition_table_mb: float = 0, replacement_policy: str = TranspositionTable.DEPTH_PREFERRED,
+                 time_per_move: float = None, time_per_game: float = None, workers: int = 1, stats_hook = None, opening_book = None,
+                 beam_widths: list[int] = None, move_ordering: bool = False, ponder: bool = False, race_solver = None) -> None:
         super().__init__(name)
         self.eval_func: int = eval_func_int
         self.heuristic = Player_Computer.DEFAULT_HEURISTIC
         self.depth = depth
+
+        self.time_per_move: float = time_per_move
+        self.time_per_game: float = time_per_game
+        self.time_used: float = 0
+
+        # The transposition table is only used if it is given a size. Iterative deepening needs it to order the moves with the best line of the previous depth
+        if transposition_table_mb <= 0  and  self.uses_time_control():
+            transposition_table_mb = Player_Computer.TIME_CONTROL_TRANSPOSITION_TABLE_MB
+        self.transposition_table: TranspositionTable = TranspositionTable(transposition_table_mb, replacement_policy) if transposition_table_mb > 0 else None
+
+        # The processes of the parallel search are created with the first search, each one with its own transposition table
+        self.workers: int = workers
+        self.transposition_table_mb: float = transposition_table_mb
+        self.replacement_policy: str = replacement_policy
+        self.executor: ProcessPoolExecutor = None
+        self.shared_alpha = None
+        self.search_id: int = 0
+
+        # Counters of the last call to get_move
+        self.last_search_stats: SearchStats = SearchStats()
+        self.stats_hook = stats_hook
+
+        # Books built from games (evaluation function 0) do not depend on the evaluation function
+        if opening_book is not None  and  opening_book.eval_func not in [0, eval_func_int]:
+            raise ValueError(f"The opening book {opening_book.path} was built with the evaluation function {opening_book.eval_func}, not {eval_func_int}")
+        self.opening_book = opening_book
+        self.race_solver = race_solver
+        self.beam_widths: list[int] = list(beam_widths) if beam_widths else None
+        self.move_ordering: MoveOrdering = MoveOrdering() if move_ordering else None
+
+        # Background search of the position expected after the reply of the opponent, and its hash
+        self.ponder: bool = ponder
+        self.ponder_process: multiprocessing.Process = None
+        self.ponder_connection = None
+        self.ponder_hash: int = None
+        self.ponder_hits: int = 0
+        self.ponder_misses: int = 0
+        # Depth of the pondering: the deepest depth completed in the last search with time control
+        self.ponder_depth: int = 1 if self.uses_time_control() else depth
     
     def set_heuristic(self, f):
         self.heuristic = f
+        # The stored results are not valid for a different heuristic
+        if self.transposition_table is not None:
+            self.transposition_table.clear()
+        if self.move_ordering is not None:
+            self.move_ordering.clear()
+        self.close()
+
+    """Stops the processes of the parallel search and of the pondering, and saves the positions solved by the race solver"""
+    def close(self) -> None:
+        self.stop_ponder()
+        if self.race_solver is not None:
+            self.race_solver.save_new_entries()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor, self.shared_alpha = None, None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            context = multiprocessing.get_context()
+            self.shared_alpha = context.Value("d", -1_000_000_000)
+            self.executor = ProcessPoolExecutor(self.workers, context, initializer=init_search_worker,
+                                                initargs=(self.shared_alpha, self.transposition_table_mb, self.replacement_policy, self.move_ordering is not None))
+        return self.executor
+
+    """Returns the (score, origin, destination) of the best move found at the depth, in parallel if there are several workers.
+    Given the score of the previous depth of the iterative deepening, the search starts with an aspiration window around
+    it, and only if the score falls outside the window it is searched again with the whole window. Inside the window the
+    score and the move are the same as with the whole window"""
+    def search(self, board: Board, depth: int, deadline: float = None, previous_score: int = None) -> tuple[int, Tile, Tile]:
+        if self.workers > 1  and  depth > 1  and  not board.has_game_ended():
+            return self.parallel_search(board, depth, deadline)
+        if previous_score is not None:
+            window: int = Player_Computer.ASPIRATION_WINDOW_EVAL_1 if self.uses_eval_func_1() else Player_Computer.ASPIRATION_WINDOW_EVAL_2
+            alpha, beta = previous_score - window, previous_score + window
+            result = minimax_pruning(board, depth, self.is_player1(), self.get_heuristic(), self.uses_eval_func_1(), True, alpha, beta, self.transposition_table,
+                                     deadline, self.last_search_stats, self.beam_widths, self.move_ordering, skip_mirrored_moves=True)
+            if alpha < result[0] < beta:
+                return result
+            self.last_search_stats.researches += 1
+        return minimax_pruning(board, depth, self.is_player1(), self.get_heuristic(), self.uses_eval_func_1(), transposition_table=self.transposition_table, deadline=deadline, stats=self.last_search_stats, beam_widths=self.beam_widths, move_ordering=self.move_ordering, skip_mirrored_moves=True)
+
+    """Splits the moves of the root between the processes. Returns the same move as minimax_pruning without a transposition table"""
+    def parallel_search(self, board: Board, depth: int, deadline: float = None) -> tuple[int, Tile, Tile]:
+        beam_width: int = self.beam_widths[0] if self.beam_widths else None
+        root_moves: list[tuple[Tile, Tile]] = remove_mirrored_moves(board, generate_moves(board, self.is_player1(), self.get_heuristic(), None, beam_width,
+                                                                                          self.uses_eval_func_1(), self.move_ordering, depth))
+        if not root_moves:
+            # Without moves (or without moves the heuristic accepts) the serial search already knows what to do
+            return minimax_pruning(board, depth, self.is_player1(), self.get_heuristic(), self.uses_eval_func_1(), stats=self.last_search_stats)
+
+        executor: ProcessPoolExecutor = self.get_executor()
+        self.shared_alpha.value = -1_000_000_000
+        self.search_id += 1
+        futures = [executor.submit(search_root_move, board, self.get_heuristic(), tile_origin.index, tile_destination.index,
+                                   depth, self.is_player1(), self.uses_eval_func_1(), self.search_id, deadline, self.beam_widths)
+                   for (tile_origin, tile_destination) in root_moves]
+        results = []
+        for future in futures:
+            points, stats = future.result()
+            self.last_search_stats.merge(stats)
+            results.append(points)
+        if any(points is None for points in results):
+            raise SearchTimeout()
+
+        # Like in minimax_pruning, the first move with the highest score is chosen
+        max_points, better_origin, better_destination = float('-inf'), None, None
+        for ((tile_origin, tile_destination), points) in zip(root_moves, results):
+            if points > max_points:
+                max_points, better_origin, better_destination = points, tile_origin, tile_destination
+        return max_points, better_origin, better_destination
+
+    """Returns the move found by the pondering if the opponent made the predicted move, or None. With time control it waits
+    for the pondering to finish at most PONDER_WAIT_FRACTION of the time for the move, so the rest of the time is left for
+    a search if it does not finish; that prediction is counted as a miss, like one whose process died. The pondering is
+    always stopped"""
+    def get_ponder_move(self, board: Board, time_for_move: float = None) -> tuple[Tile, Tile]:
+        if self.ponder_process is None:
+            return None
+
+        ponder_move: tuple[Tile, Tile] = None
+        timeout: float = Player_Computer.PONDER_WAIT_FRACTION * time_for_move if time_for_move is not None else None
+        try:
+            if board.get_hash() == self.ponder_hash  and  self.ponder_connection.poll(timeout):
+                (origin_index, destination_index, stats) = self.ponder_connection.recv()
+                self.last_search_stats.merge(stats)
+                if origin_index is not None:
+                    ponder_move = (board.board_tiles[origin_index], board.board_tiles[destination_index])
+        except (EOFError, OSError):
+            # The pondering process died without sending its move: it is a miss and the position is searched as usual
+            pass
+        if ponder_move is not None:
+            self.ponder_hits += 1
+        else:
+            self.ponder_misses += 1
+        self.stop_ponder()
+        return ponder_move
+
+    """Predicts the reply of the opponent to the move and starts searching the resulting position in a background process"""
+    def start_ponder(self, board: Board, move: tuple[Tile, Tile]) -> None:
+        ponder_board: Board = board.copy()
+        ponder_board.move_piece_to_tile(ponder_board.board_tiles[move[0].index], ponder_board.board_tiles[move[1].index])
+        if ponder_board.has_game_ended():
+            return
+
+        # The reply is the move stored in the transposition table by the search, or the best one of a search of depth 1
+        is_opponent_player1: bool = not self.is_player1()
+        reply: tuple[Tile, Tile] = None
+        if self.transposition_table is not None:
+            key, symmetry = get_canonical_key(ponder_board, is_opponent_player1)
+            entry = self.transposition_table.probe(key)
+            if entry is not None  and  entry[4] is not None:
+                reply = (ponder_board.board_tiles[PERMUTATIONS[symmetry][entry[4]]], ponder_board.board_tiles[PERMUTATIONS[symmetry][entry[5]]])
+                if reply not in ponder_board.get_all_player_moves(is_opponent_player1):
+                    reply = None
+        if reply is None:
+            _, tile_origin, tile_destination = minimax_pruning(ponder_board, 1, is_opponent_player1, accept_all_moves, self.uses_eval_func_1())
+            if tile_origin is None:
+                return
+            reply = (tile_origin, tile_destination)
+        ponder_board.move_piece_to_tile(*reply)
+        if ponder_board.has_game_ended():
+            return
+
+        self.ponder_hash = ponder_board.get_hash()
+        self.ponder_connection, child_connection = multiprocessing.Pipe(duplex=False)
+        self.ponder_process = multiprocessing.Process(target=ponder_search, daemon=True,
+                                                      args=(child_connection, ponder_board, self.ponder_depth, self.is_player1(), self.get_heuristic(),
+                                                            self.uses_eval_func_1(), self.transposition_table_mb, self.beam_widths, self.move_ordering is not None))
+        self.ponder_process.start()
+        child_connection.close()
+
+    def stop_ponder(self) -> None:
+        if self.ponder_process is not None:
+            self.ponder_process.terminate()
+            self.ponder_process.join()
+            self.ponder_connection.close()
+            self.ponder_process, self.ponder_connection, self.ponder_hash = None, None, None
+
+    """Returns (depth, lines) with the number_of_lines best moves of the player in the position, for example to give hints
+    (see search_multi_pv). The search uses the configuration of the player up to its depth, stopping after time_limit seconds
+    or max_nodes nodes if they are given. The opening book, the race solver, the pondering and the workers are not used, and
+    the time of the search is not counted in the time of the game"""
+    def get_best_moves(self, board: Board, number_of_lines: int = 3, time_limit: float = None, max_nodes: int = None) -> tuple[int, list[tuple[int, list[tuple[Tile, Tile]]]]]:
+        self.last_search_stats = SearchStats()
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self.move_ordering is not None:
+            self.move_ordering.new_search()
+        deadline: float = time.monotonic() + time_limit if time_limit is not None else None
+        return search_multi_pv(board, self.depth, self.is_player1(), self.get_heuristic(), self.uses_eval_func_1(), number_of_lines, self.transposition_table,
+                               deadline, max_nodes, self.last_search_stats, self.beam_widths, self.move_ordering)
+
+    """Fraction of the moves of the opponent that were predicted by the pondering"""
+    def get_ponder_hit_rate(self) -> float:
+        predictions: int = self.ponder_hits + self.ponder_misses
+        return self.ponder_hits / predictions if predictions else 0
 
     def get_move(self, board: Board) -> tuple[Tile, Tile]:
-        _, tile_origin, tile_destination = minimax_pruning(board, self.depth, self.is_player1(), self.get_heuristic(), self.uses_eval_func_1())
-        return (tile_origin, tile_destination)
+        self.last_search_stats = SearchStats()
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self.move_ordering is not None:
+            self.move_ordering.new_search()
+
+        start: float = time.monotonic()
+        time_for_move: float = self.get_time_for_move() if self.uses_time_control() else None
+        book_move: tuple[Tile, Tile] = self.opening_book.get_move(board, self.is_player1()) if self.opening_book is not None else None
+        race_move: tuple[Tile, Tile] = None
+        if self.race_solver is not None  and  book_move is None:
+            race_deadline: float = start + Player_Computer.RACE_SOLVER_TIME_FRACTION * time_for_move if time_for_move is not None else None
+            race_move = self.race_solver.get_move(board, self.is_player1(), race_deadline)
+        # The pondering is only waited for if there is no move of the book or of the race solver
+        if book_move is None  and  race_move is None:
+            ponder_move: tuple[Tile, Tile] = self.get_ponder_move(board, time_for_move)
+        else:
+            ponder_move: tuple[Tile, Tile] = None
+            self.stop_ponder()
+        if book_move is not None:
+            best_move: tuple[Tile, Tile] = book_move
+
+        elif race_move is not None:
+            best_move: tuple[Tile, Tile] = race_move
+            if self.uses_time_control():
+                self.time_used += time.monotonic() - start
+
+        elif ponder_move is not None:
+            best_move: tuple[Tile, Tile] = ponder_move
+            if self.uses_time_control():
+                self.time_used += time.monotonic() - start
+
+        elif not self.uses_time_control():
+            _, tile_origin, tile_destination = self.search(board, self.depth)
+            self.last_search_stats.time_per_depth[self.depth] = time.monotonic() - start
+            best_move: tuple[Tile, Tile] = (tile_origin, tile_destination)
+
+        else:
+            # The race solver and a ponder hit that did not finish used at most their fraction of the time, the rest is for the search
+            deadline: float = start + time_for_move
+            best_move: tuple[Tile, Tile] = (None, None)
+            score: int = None
+            for depth in range(1, self.depth + 1):
+                depth_start: float = time.monotonic()
+                try:
+                    # The depth 1 always finishes, so there is always a move to return
+                    score, tile_origin, tile_destination = self.search(board, depth, None if depth == 1 else deadline, score)
+                except SearchTimeout:
+                    self.last_search_stats.time_per_depth[depth] = time.monotonic() - depth_start
+                    break
+                self.last_search_stats.time_per_depth[depth] = time.monotonic() - depth_start
+                best_move = (tile_origin, tile_destination)
+                self.ponder_depth = depth
+                if time.monotonic() >= deadline:
+                    break
+
+            self.time_used += time.monotonic() - start
+
+        if self.ponder  and  best_move[0] is not None:
+            self.start_ponder(board, best_move)
+
+        if self.stats_hook is not None:
+            self.stats_hook(self, self.last_search_stats)
+        return best_move
+
+    """Returns True if the search is limited by time instead of only by depth"""
+    def uses_time_control(self) -> bool:
+        return self.time_per_move is not None  or  self.time_per_game is not None
+
+    """Returns the seconds available for the next move"""
+    def get_time_for_move(self) -> float:
+        time_for_move: float = float('inf')
+        if self.time_per_game is not None:
+            time_for_move = max(0, self.time_per_game - self.time_used) / Player_Computer.EXPECTED_MOVES_LEFT
+        if self.time_per_move is not None:
+            time_for_move = min(time_for_move, self.time_per_move)
+        return time_for_move
 
     def get_heuristic(self):
         return self.heuristic
+
+    def get_beam_widths(self) -> list[int]:
+        return self.beam_widths
+
+    def uses_move_ordering(self) -> bool:
+        return self.move_ordering is not None
+
+    def get_last_search_stats(self) -> SearchStats:
+        return self.last_search_stats
+
+    def set_stats_hook(self, f) -> None:
+        self.stats_hook = f
     
     def get_eval_func(self) -> int:
         return self.eval_func
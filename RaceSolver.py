@@ -0,0 +1,264 @@
+import argparse
+import os
+import struct
+import time
+from Board import Board
+from Tile import Tile
+from BitBoard import BitBoard, BOTTOM_TRIANGLE_MASK, TOP_TRIANGLE_MASK, iterate_bits
+from Symmetry import get_canonical_mask, transform_mask, ROTATION
+
+"""Exact solver of races: positions where the pieces of both players have passed each other, so each player only has
+to bring its own pieces to its target triangle as fast as possible. The solver searches only the pieces of one player
+(the opponent is ignored) with IDA*.
+
+The table holds the exact number of moves of every position that fills the triangle in at most table_moves moves (the
+last moves of every race), built with a breadth first search backwards from the full triangle. Besides its exact results
+it gives the search a strong lower bound: a position that is not in the table needs at least table_moves + 1 moves. The
+positions solved later (every position on the optimal line found by a search) are added to the table, and the table can
+be saved to a file and loaded again with them. A position and its mirrored position need the same number of moves, so
+only the canonical one (see Symmetry.py) is stored.
+
+The table is bounded by the moves left and not by the number of pieces left outside the triangle (the last K pieces):
+with only 3 pieces outside they can still be anywhere on the board, about 13 million canonical positions, too many to
+build and store, while the positions at most 5 moves away are about 58 thousand. The positions with a few pieces outside
+that are far from the triangle are solved by the search and added to the table as they are reached.
+
+Every call to get_move (or solve) has a budget of node_budget nodes and an optional deadline, shared by all its searches.
+
+Positions of the player2 are rotated 180 degrees (the tile i is the tile 120 - i) so both players share the same
+results, always as if the player1 was moving its pieces to the bottom triangle"""
+
+NUMBER_OF_TILES: int = Board.NUMBER_OF_TILES
+MASK_BYTES: int = (NUMBER_OF_TILES + 7) // 8
+
+"""Raised when a search needs more nodes than its budget or reaches its deadline"""
+class RaceBudgetExceeded(Exception):
+    pass
+
+"""Returns True if the pieces of the two players can no longer meet: every piece of the player1 is in a row below all the
+pieces of the player2 and no player has pieces left in the target triangle of the other one"""
+def is_race(board: Board) -> bool:
+    player1_mask, player2_mask = board.get_player_masks()
+    if player2_mask & BOTTOM_TRIANGLE_MASK  or  player1_mask & TOP_TRIANGLE_MASK:
+        return False
+    tiles: list[Tile] = board.board_tiles
+    lowest_player1_row: int = min(tiles[i].row for i in iterate_bits(player1_mask))
+    highest_player2_row: int = max(tiles[i].row for i in iterate_bits(player2_mask))
+    return lowest_player1_row > highest_player2_row
+
+class RaceSolver():
+    MAGIC: bytes = b"CCRACE01"
+    VERSION: int = 2
+    # magic, version, table_moves, number of entries
+    HEADER: struct.Struct = struct.Struct("<8sHBI")
+    # mask with the pieces of the player, number of moves needed to fill the triangle
+    ENTRY: struct.Struct = struct.Struct(f"<{MASK_BYTES}sB")
+
+    """With a table_path the table is loaded from that file, or built and saved there if the file does not exist"""
+    def __init__(self, table_path: str = None, table_moves: int = 5, node_budget: int = 50_000) -> None:
+        self.table_path: str = table_path
+        self.table_moves: int = table_moves
+        self.node_budget: int = node_budget
+        # Exact number of moves of the positions in the table and of the positions solved later, by canonical mask
+        self.table: dict[int, int] = {}
+        # Positions added to the table since it was loaded or saved
+        self.unsaved_entries: int = 0
+        # Lower bounds found by the searches that did not fill the triangle, only kept during a call (see start_budget)
+        self.lower_bounds: dict[int, int] = {}
+        # Nodes searched and deadline (time.monotonic) of the current call
+        self.nodes: int = 0
+        self.deadline: float = None
+
+        if table_path is not None  and  os.path.exists(table_path):
+            self.load(table_path)
+        else:
+            self.build_table()
+            if table_path is not None:
+                self.save()
+
+    """Returns (table_moves, table) read from the file"""
+    def read_table(self, path: str) -> tuple[int, dict[int, int]]:
+        with open(path, "rb") as table_file:
+            data: bytes = table_file.read()
+        (magic, version, table_moves, number_of_entries) = RaceSolver.HEADER.unpack_from(data, 0)
+        if magic != RaceSolver.MAGIC  or  version != RaceSolver.VERSION:
+            raise ValueError(f"{path} is not a race table of version {RaceSolver.VERSION}")
+        table: dict[int, int] = {}
+        for (mask_bytes, moves) in RaceSolver.ENTRY.iter_unpack(data[RaceSolver.HEADER.size:]):
+            table[int.from_bytes(mask_bytes, "little")] = moves
+        return table_moves, table
+
+    def load(self, path: str) -> None:
+        self.table_moves, self.table = self.read_table(path)
+        self.unsaved_entries = 0
+
+    """Writes the table (to the file it was loaded from if no path is given). The positions already in the file are kept,
+    so several processes can add the positions they solved to the same file. The file is written to a temporary file and
+    renamed, so it is never read half written"""
+    def save(self, path: str = None) -> None:
+        path = path or self.table_path
+        if os.path.exists(path):
+            table_moves, table = self.read_table(path)
+            if table_moves == self.table_moves:
+                for (mask, moves) in table.items():
+                    self.table.setdefault(mask, moves)
+        temporary_path: str = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as table_file:
+            table_file.write(RaceSolver.HEADER.pack(RaceSolver.MAGIC, RaceSolver.VERSION, self.table_moves, len(self.table)))
+            for mask in sorted(self.table):
+                table_file.write(RaceSolver.ENTRY.pack(mask.to_bytes(MASK_BYTES, "little"), self.table[mask]))
+        os.replace(temporary_path, path)
+        self.unsaved_entries = 0
+
+    """Saves the table to its file if positions were solved since it was loaded or saved"""
+    def save_new_entries(self) -> None:
+        if self.table_path is not None  and  self.unsaved_entries > 0:
+            self.save()
+
+    """Fills the table with every position at most table_moves moves away from the full triangle, going backwards from it.
+    A move can be undone with the same step or jumps (the jumped pieces do not move), except the ones that would take a
+    piece out of the triangle: going backwards, a piece outside the triangle can not move into it"""
+    def build_table(self) -> None:
+        self.table = {BOTTOM_TRIANGLE_MASK: 0}
+        # Only the canonical positions are explored: the mirrored moves of a mirrored position lead to the mirrored positions
+        frontier: list[int] = [BOTTOM_TRIANGLE_MASK]
+        for moves in range(1, self.table_moves + 1):
+            next_frontier: list[int] = []
+            for mask in frontier:
+                bitboard = BitBoard(mask, 0)
+                for destination in iterate_bits(mask):
+                    origins: int = bitboard.get_all_possible_tiles_to_move(destination)
+                    if not BOTTOM_TRIANGLE_MASK & (1 << destination):
+                        origins &= ~BOTTOM_TRIANGLE_MASK
+                    for origin in iterate_bits(origins):
+                        parent: int = self.get_key(mask ^ (1 << destination) ^ (1 << origin))
+                        if parent not in self.table:
+                            self.table[parent] = moves
+                            next_frontier.append(parent)
+            frontier = next_frontier
+
+    def get_key(self, mask: int) -> int:
+        return get_canonical_mask(mask)[0]
+
+    def get_pieces_outside(self, mask: int) -> int:
+        return (mask & ~BOTTOM_TRIANGLE_MASK).bit_count()
+
+    """Lower bound of the moves of a position that is not in the table: a move brings at most one piece into the triangle,
+    and every position not in the table needs more than table_moves moves"""
+    def get_lower_bound(self, mask: int) -> int:
+        return max(self.get_pieces_outside(mask), self.table_moves + 1, self.lower_bounds.get(self.get_key(mask), 0))
+
+    """Returns the children of the position, the ones that bring more pieces forward first"""
+    def get_children(self, mask: int) -> list[int]:
+        moves: list[tuple[int, int]] = BitBoard(mask, 0).get_all_player_moves(True)
+        moves.sort(key=lambda move: move[1] - move[0], reverse=True)
+        return [mask ^ (1 << origin) ^ (1 << destination) for (origin, destination) in moves]
+
+    """Depth first search limited by bound. Returns the lowest g + h that exceeded the bound, or -1 if the triangle was filled.
+    The bounds only grow to the lowest value that exceeded them, so when the triangle is filled every position on the line
+    needs exactly bound - g moves, and it is added to the table"""
+    def search(self, mask: int, g: int, bound: int) -> int:
+        self.nodes += 1
+        if self.nodes > self.node_budget  or  (self.deadline is not None  and  time.monotonic() > self.deadline):
+            raise RaceBudgetExceeded()
+
+        key: int = self.get_key(mask)
+        known = self.table.get(key, None)
+        if known is not None:
+            return -1 if g + known <= bound else g + known
+        h: int = self.get_lower_bound(mask)
+        if g + h > bound:
+            return g + h
+
+        next_bound: int = 1_000_000
+        for child in self.get_children(mask):
+            result: int = self.search(child, g + 1, bound)
+            if result == -1:
+                self.add_entry(key, bound - g)
+                return -1
+            next_bound = min(next_bound, result)
+        # None of the children fills the triangle within the bound
+        self.lower_bounds[key] = max(self.lower_bounds.get(key, 0), next_bound - g)
+        return next_bound
+
+    def add_entry(self, key: int, moves: int) -> None:
+        if key not in self.table:
+            self.table[key] = moves
+            self.unsaved_entries += 1
+
+    """Starts the budget of a call: node_budget nodes and the deadline, shared by all its searches. The lower bounds of the
+    previous call are dropped, so they do not grow without limit in a solver that plays many games"""
+    def start_budget(self, deadline: float = None) -> None:
+        self.nodes = 0
+        self.deadline = deadline
+        self.lower_bounds.clear()
+
+    """Returns the minimum number of moves of the position with what is left of the budget, or None if it runs out"""
+    def solve_within_budget(self, mask: int) -> int:
+        key: int = self.get_key(mask)
+        known = self.table.get(key, None)
+        if known is not None:
+            return known
+
+        bound: int = self.get_lower_bound(mask)
+        try:
+            while True:
+                result: int = self.search(mask, 0, bound)
+                if result == -1:
+                    return bound
+                bound = result
+        except RaceBudgetExceeded:
+            return None
+
+    """Returns the minimum number of moves needed to fill the bottom triangle with the pieces of the mask, or None if
+    the search needs more nodes than the budget or reaches the deadline (time.monotonic)"""
+    def solve(self, mask: int, deadline: float = None) -> int:
+        self.start_budget(deadline)
+        return self.solve_within_budget(mask)
+
+    """Returns the move of the player that fills its target triangle in the fewest moves, or None if the position is not
+    a race or it cannot be solved within the budget and the deadline (time.monotonic)"""
+    def get_move(self, board: Board, is_player1: bool, deadline: float = None) -> tuple[Tile, Tile]:
+        if not is_race(board):
+            return None
+        player1_mask, player2_mask = board.get_player_masks()
+        mask: int = player1_mask if is_player1 else transform_mask(player2_mask, ROTATION)
+        self.start_budget(deadline)
+        moves: int = self.solve_within_budget(mask)
+        if moves is None  or  moves == 0:
+            return None
+
+        # The children on the line found by the search are already in the table, so they are tried first. The others are
+        # skipped if their lower bound is too high, and solved with the rest of the budget otherwise
+        valid_moves: list[tuple[Tile, Tile]] = board.get_all_player_moves(is_player1)
+        children: list[int] = self.get_children(mask)
+        children.sort(key=lambda child: self.table.get(self.get_key(child), None) != moves - 1)
+        for child in children:
+            child_moves: int = self.table.get(self.get_key(child), None)
+            if child_moves is None:
+                if self.get_lower_bound(child) > moves - 1:
+                    continue
+                child_moves = self.solve_within_budget(child)
+                if child_moves is None:
+                    return None
+            if child_moves == moves - 1:
+                (origin, destination) = (mask & ~child).bit_length() - 1, (child & ~mask).bit_length() - 1
+                if not is_player1:
+                    origin, destination = NUMBER_OF_TILES - 1 - origin, NUMBER_OF_TILES - 1 - destination
+                move: tuple[Tile, Tile] = (board.board_tiles[origin], board.board_tiles[destination])
+                # The opponent was ignored, so the move must also be valid with its pieces on the board
+                if move in valid_moves:
+                    return move
+        return None
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the table of the race solver and saves it to a file")
+    parser.add_argument("path")
+    parser.add_argument("--table-moves", type=int, default=5, help="Moves from the full triangle of the positions in the table")
+    args = parser.parse_args()
+
+    solver = RaceSolver(table_moves=args.table_moves)
+    solver.save(args.path)
+    print(f"{len(solver.table)} positions saved to {args.path}")
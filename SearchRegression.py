@@ -0,0 +1,177 @@
+import argparse
+import random
+import sys
+from Board import Board
+from Game import get_heuristic
+from Players import minimax_pruning, search_multi_pv, generate_moves, get_child_beam_widths, accept_all_moves
+from TranspositionTable import TranspositionTable
+from MoveOrdering import MoveOrdering
+from Symmetry import remove_mirrored_moves
+
+"""Checks that the search keeps the results of the minimax search it replaced: at a fixed depth minimax_pruning (a negamax
+with principal variation search) must return the same score and move as reference_minimax, a copy of the minimax with
+alpha-beta pruning it was before, on random positions from a seed. The move is only compared where the order of the
+moves is the same (with move ordering, among moves with the same score the chosen one may be different).
+It also checks that the multi-PV search returns the best lines: their scores must be the best exact scores of the moves
+of the root (searched one by one with reference_minimax), and the first one the score of minimax_pruning"""
+
+# Configurations of the search: (name, uses the heuristic, transposition table, beam widths, move ordering, compare the move)
+SEARCH_CONFIGS: list[tuple[str, bool, bool, list[int], bool, bool]] = [
+    ("plain", False, False, None, False, True),
+    ("heuristic", True, False, None, False, True),
+    ("transposition_table", False, True, None, False, True),
+    ("beam", False, False, [6, 3], False, True),
+    ("move_ordering", False, False, None, True, False),
+]
+
+"""Minimax with alpha-beta pruning, as the search was before it was rewritten as negamax, without transposition table or
+move ordering. Returns (score, origin, destination) with the score for the player of the root, and the first move with
+the best score. Like the current search, a player without moves is scored as a leaf, and if the heuristic leaves a player
+without moves all its moves are searched"""
+def reference_minimax(board: Board, depth: int, is_player1_turn: bool, heuristic, use_eval_func_1: bool, maximizing: bool = True,
+                      alpha: int = -1_000_000_000, beta: int = 1_000_000_000, beam_widths: list[int] = None) -> tuple:
+    if depth == 0  or  board.has_game_ended():
+        return board.get_score(is_player1_turn, use_eval_func_1) + depth, None, None
+
+    is_player1_moving: bool = is_player1_turn == maximizing
+    beam_width: int = beam_widths[0] if beam_widths else None
+    moves = generate_moves(board, is_player1_moving, heuristic, None, beam_width, use_eval_func_1)
+    if not moves  and  heuristic is not accept_all_moves:
+        moves = generate_moves(board, is_player1_moving, accept_all_moves, None, beam_width, use_eval_func_1)
+    if not moves:
+        return board.get_score(is_player1_turn, use_eval_func_1) + depth, None, None
+
+    best_score, better_origin, better_destination = None, None, None
+    for (tile_origin, tile_destination) in moves:
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        try:
+            score: int = reference_minimax(board, depth-1, is_player1_turn, heuristic, use_eval_func_1, not maximizing, alpha, beta,
+                                           get_child_beam_widths(beam_widths))[0]
+        finally:
+            board.move_piece_to_tile(tile_destination, tile_origin)
+
+        if best_score is None  or  (score > best_score if maximizing else score < best_score):
+            best_score, better_origin, better_destination = score, tile_origin, tile_destination
+        if maximizing:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        if alpha >= beta:
+            break
+    return best_score, better_origin, better_destination
+
+"""Returns (board, is player1 turn) for number_of_positions positions reached with up to max_random_moves random moves from
+the start position, skipping the ones where the game has ended"""
+def generate_positions(number_of_positions: int, seed: int, max_random_moves: int = 40) -> list[tuple[Board, bool]]:
+    rng = random.Random(seed)
+    positions: list[tuple[Board, bool]] = []
+    while len(positions) < number_of_positions:
+        board = Board()
+        is_player1_turn: bool = True
+        for _ in range(rng.randint(0, max_random_moves)):
+            board.move_piece_to_tile(*rng.choice(board.get_all_player_moves(is_player1_turn)))
+            is_player1_turn = not is_player1_turn
+        if not board.has_game_ended():
+            positions.append((board, is_player1_turn))
+    return positions
+
+def format_move(tile_origin, tile_destination) -> str:
+    return "none" if tile_origin is None else f"{tile_origin.index}-{tile_destination.index}"
+
+"""Searches every position at every depth with both evaluation functions and every configuration of SEARCH_CONFIGS.
+Returns (number of searches, list of the differences with reference_minimax)"""
+def check_fixed_depth(positions: list[tuple[Board, bool]], depths: list[int]) -> tuple[int, list[str]]:
+    searches: int = 0
+    problems: list[str] = []
+    for (position_index, (board, is_player1_turn)) in enumerate(positions):
+        for depth in depths:
+            for use_eval_func_1 in [True, False]:
+                for (name, uses_heuristic, uses_table, beam_widths, uses_move_ordering, compare_move) in SEARCH_CONFIGS:
+                    heuristic = get_heuristic(board, is_player1_turn) if uses_heuristic else accept_all_moves
+                    expected = reference_minimax(board, depth, is_player1_turn, heuristic, use_eval_func_1, beam_widths=beam_widths)
+                    result = minimax_pruning(board, depth, is_player1_turn, heuristic, use_eval_func_1,
+                                             transposition_table=TranspositionTable(4) if uses_table else None, beam_widths=beam_widths,
+                                             move_ordering=MoveOrdering() if uses_move_ordering else None)
+                    searches += 1
+                    if result[0] != expected[0]  or  (compare_move  and  result[1:] != expected[1:]):
+                        problems.append(f"position {position_index} depth {depth} eval {1 if use_eval_func_1 else 2} {name}: "
+                                        f"{result[0]} {format_move(*result[1:])} vs {expected[0]} {format_move(*expected[1:])} in the reference")
+    return searches, problems
+
+"""Returns True if every move of the variation is valid in its turn and it has between 1 and depth moves"""
+def is_valid_variation(board: Board, variation: list, is_player1_turn: bool, depth: int) -> bool:
+    played: list = []
+    try:
+        is_player1_moving: bool = is_player1_turn
+        for move in variation:
+            if move not in board.get_all_player_moves(is_player1_moving):
+                return False
+            board.move_piece_to_tile(*move)
+            played.append(move)
+            is_player1_moving = not is_player1_moving
+    finally:
+        for (tile_origin, tile_destination) in reversed(played):
+            board.move_piece_to_tile(tile_destination, tile_origin)
+    return 1 <= len(variation) <= depth
+
+"""Searches every position with search_multi_pv at the depth, with both evaluation functions, with and without the
+heuristic. Returns (number of searches, list of the lines that are not the best ones)"""
+def check_multi_pv(positions: list[tuple[Board, bool]], depth: int, number_of_lines: int) -> tuple[int, list[str]]:
+    searches: int = 0
+    problems: list[str] = []
+    for (position_index, (board, is_player1_turn)) in enumerate(positions):
+        for use_eval_func_1 in [True, False]:
+            for uses_heuristic in [False, True]:
+                heuristic = get_heuristic(board, is_player1_turn) if uses_heuristic else accept_all_moves
+                name: str = f"position {position_index} eval {1 if use_eval_func_1 else 2}{' heuristic' if uses_heuristic else ''}"
+                completed_depth, lines = search_multi_pv(board, depth, is_player1_turn, heuristic, use_eval_func_1, number_of_lines)
+                searches += 1
+
+                # The same moves as the root of search_multi_pv, each one searched with its own exact score
+                moves = generate_moves(board, is_player1_turn, heuristic)
+                if not moves  and  heuristic is not accept_all_moves:
+                    moves = generate_moves(board, is_player1_turn, accept_all_moves)
+                exact_scores: dict = {}
+                for (tile_origin, tile_destination) in remove_mirrored_moves(board, moves):
+                    board.move_piece_to_tile(tile_origin, tile_destination)
+                    try:
+                        exact_scores[(tile_origin, tile_destination)] = reference_minimax(board, depth-1, is_player1_turn, heuristic, use_eval_func_1, False)[0]
+                    finally:
+                        board.move_piece_to_tile(tile_destination, tile_origin)
+
+                scores: list[int] = [score for (score, _) in lines]
+                best_scores: list[int] = sorted(exact_scores.values(), reverse=True)[ : number_of_lines]
+                best_score: int = minimax_pruning(board, depth, is_player1_turn, heuristic, use_eval_func_1)[0]
+                if completed_depth != depth:
+                    problems.append(f"{name}: depth {completed_depth} completed instead of {depth}")
+                elif scores != best_scores:
+                    problems.append(f"{name}: lines with the scores {scores} vs {best_scores} in the reference")
+                elif scores[0] != best_score:
+                    problems.append(f"{name}: best line with the score {scores[0]} vs {best_score} in minimax_pruning")
+                for (score, variation) in lines:
+                    if exact_scores.get(variation[0], None) != score  or  not is_valid_variation(board, variation, is_player1_turn, depth):
+                        problems.append(f"{name}: line {format_move(*variation[0])} with the score {score} vs {exact_scores.get(variation[0], None)} "
+                                        f"in the reference, or with an invalid variation")
+    return searches, problems
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks the fixed depth search and the multi-PV search against the reference minimax")
+    parser.add_argument("--positions", type=int, default=20, help="Number of random positions")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--multi-pv-depth", type=int, default=3, help="Depth of the check of the multi-PV search (0 to skip it)")
+    parser.add_argument("--lines", type=int, default=3, help="Number of lines of the multi-PV search")
+    args = parser.parse_args()
+
+    positions = generate_positions(args.positions, args.seed)
+    searches, problems = check_fixed_depth(positions, args.depths)
+    if args.multi_pv_depth > 0:
+        multi_pv_searches, multi_pv_problems = check_multi_pv(positions, args.multi_pv_depth, args.lines)
+        searches += multi_pv_searches
+        problems += multi_pv_problems
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print(f"{searches} searches checked, {len(problems)} different from the reference")
+    sys.exit(1 if problems else 0)
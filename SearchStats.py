@@ -0,0 +1,72 @@
+"""Counters collected during a search"""
+class SearchStats():
+    def __init__(self) -> None:
+        # Number of calls to negamax
+        self.nodes: int = 0
+        # Nodes evaluated with Board.get_score (depth 0 or end of the game)
+        self.leaves: int = 0
+        # Calls to Board.has_game_ended
+        self.game_ended_checks: int = 0
+        # Moves tried in the nodes that were not leaves, and number of those nodes
+        self.moves_searched: int = 0
+        self.internal_nodes: int = 0
+        # Alpha-beta cutoffs, and how many of them happened at each move index (0 is the first move tried)
+        self.cutoffs: int = 0
+        self.cutoffs_by_move_index: dict[int, int] = {}
+        # Moves searched again with a wider window: after a null window search of the principal variation search, or
+        # after a root search that fell outside its aspiration window
+        self.researches: int = 0
+        # Seconds spent in each depth of the search
+        self.time_per_depth: dict[int, float] = {}
+
+    """Adds the counters of another search (for example, the one of another process)"""
+    def merge(self, other) -> None:
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.game_ended_checks += other.game_ended_checks
+        self.moves_searched += other.moves_searched
+        self.internal_nodes += other.internal_nodes
+        self.cutoffs += other.cutoffs
+        self.researches += other.researches
+        for (move_index, cutoffs) in other.cutoffs_by_move_index.items():
+            self.cutoffs_by_move_index[move_index] = self.cutoffs_by_move_index.get(move_index, 0) + cutoffs
+        for (depth, seconds) in other.time_per_depth.items():
+            self.time_per_depth[depth] = self.time_per_depth.get(depth, 0) + seconds
+
+    def add_cutoff(self, move_index: int) -> None:
+        self.cutoffs += 1
+        self.cutoffs_by_move_index[move_index] = self.cutoffs_by_move_index.get(move_index, 0) + 1
+
+    """Average number of moves tried in the nodes that were not leaves"""
+    def get_branching_factor(self) -> float:
+        return self.moves_searched / self.internal_nodes if self.internal_nodes else 0
+
+    """Fraction of the cutoffs produced by the first move tried: the closer to 1, the better the move ordering"""
+    def get_first_move_cutoff_rate(self) -> float:
+        return self.cutoffs_by_move_index.get(0, 0) / self.cutoffs if self.cutoffs else 0
+
+    def get_total_time(self) -> float:
+        return sum(self.time_per_depth.values())
+
+    def get_nodes_per_second(self) -> float:
+        total_time: float = self.get_total_time()
+        return self.nodes / total_time if total_time else 0
+
+    """Returns all the counters in a dictionary that can be written as JSON"""
+    def to_dict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "game_ended_checks": self.game_ended_checks,
+            "cutoffs": self.cutoffs,
+            "cutoffs_by_move_index": dict(sorted(self.cutoffs_by_move_index.items())),
+            "researches": self.researches,
+            "branching_factor": self.get_branching_factor(),
+            "first_move_cutoff_rate": self.get_first_move_cutoff_rate(),
+            "time_per_depth": self.time_per_depth,
+            "nodes_per_second": self.get_nodes_per_second(),
+        }
+
+    def __str__(self) -> str:
+        return (f"{self.nodes} nodes, {self.leaves} leaves, {self.cutoffs} cutoffs ({self.get_first_move_cutoff_rate():.0%} at the first move), "
+                f"branching factor {self.get_branching_factor():.1f}, {self.get_total_time():.3f}s")
@@ -0,0 +1,98 @@
+from Board import Board
+from Tile import Tile
+from BitBoard import iterate_bits
+from BoardTopology import BoardTopology, get_topology
+import Zobrist
+
+"""Symmetries of the board, so equivalent positions are stored only once in the caches, books and tables.
+
+MIRROR reflects the board left-right: the rows and the triangles stay the same, so a position and its mirrored position
+have the same scores with both evaluation functions and mirrored moves.
+ROTATION turns the board 180 degrees and swaps the players: the pieces of the player1 become the pieces of the player2
+(and the other way around) and the other player moves. The game is the same, and so is the evaluation function 1, but
+the evaluation function 2 is not (its score table for the player1 is not the rotated table of the player2), so the
+rotation can only be used when the scores do not depend on it.
+Every symmetry is its own inverse, so a move is mapped back with the same symmetry"""
+
+IDENTITY: int = 0
+MIRROR: int = 1
+ROTATION: int = 2
+MIRROR_ROTATION: int = 3
+
+topology: BoardTopology = get_topology(Board.TILES_PER_ROW, Board.TRIANGLE_ROWS)
+# PERMUTATIONS[symmetry][i] is the tile where the symmetry takes the tile i
+PERMUTATIONS: tuple[tuple[int, ...], ...] = (
+    tuple(range(topology.number_of_tiles)),
+    topology.mirror_tiles,
+    topology.rotation_tiles,
+    tuple(topology.rotation_tiles[i] for i in topology.mirror_tiles),
+)
+
+def transform_index(index: int, symmetry: int) -> int:
+    return PERMUTATIONS[symmetry][index]
+
+def transform_mask(mask: int, symmetry: int) -> int:
+    if symmetry == IDENTITY:
+        return mask
+    permutation: tuple[int, ...] = PERMUTATIONS[symmetry]
+    res: int = 0
+    for i in iterate_bits(mask):
+        res |= 1 << permutation[i]
+    return res
+
+"""Returns the (player1 mask, player2 mask, is_player1_turn) of the position after the symmetry"""
+def transform_position(player1_mask: int, player2_mask: int, is_player1_turn: bool, symmetry: int) -> tuple[int, int, bool]:
+    if symmetry & ROTATION:
+        return transform_mask(player2_mask, symmetry), transform_mask(player1_mask, symmetry), not is_player1_turn
+    return transform_mask(player1_mask, symmetry), transform_mask(player2_mask, symmetry), is_player1_turn
+
+"""Returns the canonical form of the position, the same for all its symmetric positions, as (player1 mask, player2 mask,
+is_player1_turn, symmetry applied). The moves of the canonical position are mapped back with the same symmetry"""
+def get_canonical_position(player1_mask: int, player2_mask: int, is_player1_turn: bool, use_rotation: bool = False) -> tuple[int, int, bool, int]:
+    symmetries: list[int] = [IDENTITY, MIRROR, ROTATION, MIRROR_ROTATION] if use_rotation else [IDENTITY, MIRROR]
+    candidates = [(*transform_position(player1_mask, player2_mask, is_player1_turn, symmetry), symmetry) for symmetry in symmetries]
+    # The player1 moves in the canonical position whenever the rotation is used
+    return min(candidates, key=lambda candidate: (not candidate[2], candidate[0], candidate[1]))
+
+"""Returns (key, symmetry): the Zobrist hash (with the turn) of the canonical position of the board, and the symmetry that
+takes the board to it. Without rotation it only compares the hash of the board with its mirrored hash, kept with every move"""
+def get_canonical_key(board: Board, is_player1_turn: bool, use_rotation: bool = False) -> tuple[int, int]:
+    if use_rotation:
+        (player1_mask, player2_mask, is_canonical_player1_turn, symmetry) = get_canonical_position(*board.get_player_masks(), is_player1_turn, True)
+        return Zobrist.hash_with_turn(Zobrist.hash_masks(player1_mask, player2_mask), is_canonical_player1_turn), symmetry
+    position_hash, mirror_hash = board.get_hash(), board.get_mirror_hash()
+    if mirror_hash < position_hash:
+        return Zobrist.hash_with_turn(mirror_hash, is_player1_turn), MIRROR
+    return Zobrist.hash_with_turn(position_hash, is_player1_turn), IDENTITY
+
+"""Returns (mask, symmetry) with the canonical form of the pieces of a single player, the lowest of the mask and its mirror"""
+def get_canonical_mask(mask: int) -> tuple[int, int]:
+    mirror_mask: int = transform_mask(mask, MIRROR)
+    return (mirror_mask, MIRROR) if mirror_mask < mask else (mask, IDENTITY)
+
+"""Returns the tiles of the board where the symmetry takes the move"""
+def transform_move(board: Board, tile_origin: Tile, tile_destination: Tile, symmetry: int) -> tuple[Tile, Tile]:
+    permutation: tuple[int, ...] = PERMUTATIONS[symmetry]
+    return board.board_tiles[permutation[tile_origin.index]], board.board_tiles[permutation[tile_destination.index]]
+
+"""Returns True if the position is the same as its mirrored position"""
+def is_mirror_symmetric(board: Board) -> bool:
+    if board.get_hash() != board.get_mirror_hash():
+        return False
+    # Equal hashes are checked with the pieces, in case of a collision
+    player1_mask, player2_mask = board.get_player_masks()
+    return transform_mask(player1_mask, MIRROR) == player1_mask  and  transform_mask(player2_mask, MIRROR) == player2_mask
+
+"""In a mirror symmetric position every move and its mirrored move lead to mirrored positions with the same score, so
+only the first one of each pair is kept (in the same order). Other positions keep all their moves"""
+def remove_mirrored_moves(board: Board, moves: list[tuple[Tile, Tile]]) -> list[tuple[Tile, Tile]]:
+    if not is_mirror_symmetric(board):
+        return moves
+    mirror_tiles: tuple[int, ...] = PERMUTATIONS[MIRROR]
+    kept: list[tuple[Tile, Tile]] = []
+    seen: set[tuple[int, int]] = set()
+    for (tile_origin, tile_destination) in moves:
+        if (mirror_tiles[tile_origin.index], mirror_tiles[tile_destination.index]) not in seen:
+            seen.add((tile_origin.index, tile_destination.index))
+            kept.append((tile_origin, tile_destination))
+    return kept
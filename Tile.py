@@ -6,13 +6,20 @@ class Tile():
     EMPTY_TYLE_STR: str = "."
     DEFAULT_SCORE: int = -1
 
-    def __init__(self) -> None:
+    __slots__ = ("piece", "index", "row", "is_in_top_triangle", "is_in_bottom_triangle", "topology", "board_tiles")
+
+    """The index is the position of the tile in Board.board_tiles and the row its position in Board.board_row_tiles.
+    The neighbours and the scores of the tile are not copied in it: they are read by index from the topology shared by
+    all the boards (see BoardTopology.py), and the neighbours are looked up in board_tiles, the tiles of its board"""
+    def __init__(self, index: int = -1, row: int = -1, is_in_top_triangle: bool = False, is_in_bottom_triangle: bool = False,
+                 topology = None, board_tiles: list = None) -> None:
         self.piece = None
-        self.neighbours: dict[str, Tile] = {}
-        self.score1_for_player1: int = Tile.DEFAULT_SCORE
-        self.score1_for_player2: int = Tile.DEFAULT_SCORE
-        self.score2_for_player1: int = Tile.DEFAULT_SCORE
-        self.score2_for_player2: int = Tile.DEFAULT_SCORE
+        self.index: int = index
+        self.row: int = row
+        self.is_in_top_triangle: bool = is_in_top_triangle
+        self.is_in_bottom_triangle: bool = is_in_bottom_triangle
+        self.topology = topology
+        self.board_tiles: list[Tile] = board_tiles
     
     def __str__(self) -> str:
         return Tile.EMPTY_TYLE_STR if self.is_empty() else str(self.get_piece())
@@ -23,35 +30,17 @@ class Tile():
     def set_empty(self) -> None:
         self.set_piece(None)
 
-    def set_score1_for_player1(self, new_score: int) -> bool:
-        if self.score1_for_player1 == Tile.DEFAULT_SCORE  or  (new_score > self.score1_for_player1):
-            self.score1_for_player1 = new_score
-            return True
-        return False
-
-    def set_score1_for_player2(self, new_score: int) -> bool:
-        if self.score1_for_player2 == Tile.DEFAULT_SCORE  or  (new_score > self.score1_for_player2):
-            self.score1_for_player2 = new_score
-            return True
-        return False
-
-    def set_score2_for_player1(self, new_score: int) -> bool:
-        self.score2_for_player1 = new_score
-
-    def set_score2_for_player2(self, new_score: int) -> bool:
-        self.score2_for_player2 = new_score
-    
     def get_score1_for_player1(self) -> int:
-        return self.score1_for_player1
+        return self.topology.score1_for_player1[self.index]
 
     def get_score1_for_player2(self) -> int:
-        return self.score1_for_player2
+        return self.topology.score1_for_player2[self.index]
     
     def get_score2_for_player1(self) -> int:
-        return self.score2_for_player1
+        return self.topology.score2_for_player1[self.index]
 
     def get_score2_for_player2(self) -> int:
-        return self.score2_for_player2
+        return self.topology.score2_for_player2[self.index]
 
     def get_score1(self) -> int:
         if self.get_piece().is_player2_piece():
@@ -64,12 +53,17 @@ class Tile():
             return self.get_score2_for_player2()
         else:
             return self.get_score2_for_player1()
-    
-    def add_neighbour(self, direction: str, neighbour_tile) -> None:
-        self.neighbours[direction] = neighbour_tile
 
+    """Returns a dict with the neighbouring tile in every direction"""
     def get_neighbours(self) -> dict:
-        return self.neighbours
+        board_tiles: list[Tile] = self.board_tiles
+        return {direction: board_tiles[neighbour_index] for (direction, neighbour_index) in self.topology.neighbours[self.index]}
+
+    def get_index(self) -> int:
+        return self.index
+
+    def get_row(self) -> int:
+        return self.row
 
     def get_piece(self) -> Piece:
         return self.piece
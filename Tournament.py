@@ -0,0 +1,135 @@
+import argparse
+import json
+import time
+from random import Random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Board import Board
+from Players import Player_Computer
+from Game import get_heuristic
+from OpeningBook import OpeningBook
+from RaceSolver import RaceSolver
+from MCTS import Player_MCTS
+from GameRecord import create_record, write_record
+
+"""Plays games between two computer players in several processes, without asking anything through the command line.
+Every finished game is written as a JSON line to the output file"""
+
+DEFAULT_PLAYER_CONFIG: dict = {"eval_func": 1, "depth": 2, "heuristic": False}
+
+"""Creates a computer player from its configuration: eval_func (1 or 2), depth, heuristic (true/false) and optionally
+transposition_table_mb, time_per_move, time_per_game, opening_book (path of the book file), beam_widths (list of moves
+searched per ply), move_ordering (true/false), ponder (true/false) and race_table (path of the table of the race solver,
+created if it does not exist).
+With "engine": "mcts" the player is a Player_MCTS configured with iterations, time_per_move, exploration, rollout_policy,
+playout_cap, eval_func and workers"""
+def create_computer_player(board: Board, name: str, config: dict) -> Player_Computer|Player_MCTS:
+    if config.get("engine", "minimax") == "mcts":
+        return Player_MCTS(name, config.get("iterations", 1000), config.get("time_per_move", None), config.get("exploration", 1.4),
+                           config.get("rollout_policy", "random"), config.get("playout_cap", 60), config.get("eval_func", 1), config.get("workers", 1))
+
+    player = Player_Computer(name, config.get("eval_func", 1), config.get("depth", 2),
+                             transposition_table_mb=config.get("transposition_table_mb", 0),
+                             time_per_move=config.get("time_per_move", None),
+                             time_per_game=config.get("time_per_game", None),
+                             opening_book=OpeningBook(config["opening_book"]) if config.get("opening_book", None) else None,
+                             beam_widths=config.get("beam_widths", None),
+                             move_ordering=config.get("move_ordering", False),
+                             ponder=config.get("ponder", False),
+                             race_solver=RaceSolver(config["race_table"]) if config.get("race_table", None) else None)
+    if config.get("heuristic", False):
+        player.set_heuristic(get_heuristic(board, player.is_player1()))
+    return player
+
+"""Plays a whole game and returns its record (see GameRecord.py). The first random_opening_moves moves are random (with the seed of the
+game) so games between the same players are not all the same. The game stops after max_moves moves"""
+def play_game(game_index: int, player1_config: dict, player2_config: dict, max_moves: int, random_opening_moves: int, seed: int) -> dict:
+    board = Board()
+    players = (create_computer_player(board, "Player1", player1_config), create_computer_player(board, "Player2", player2_config))
+    random = Random(seed * 1_000_003 + game_index)
+
+    # Both players start the same number of games
+    first_player_index: int = game_index % 2
+    current_player_index: int = first_player_index
+
+    moves: list[list[int]] = []
+    times: list[float] = []
+    nodes: list[int] = []
+    result: str = "max_moves"
+    while len(moves) < max_moves:
+        if board.has_game_ended():
+            result = "player1" if board.has_player1_won() else "player2"
+            break
+
+        player = players[current_player_index]
+        start: float = time.monotonic()
+        if len(moves) < random_opening_moves:
+            tiles = board.get_player1_tiles() if player.is_player1() else board.get_player2_tiles()
+            valid_moves = [(tile_origin, tile_destination) for tile_origin in tiles for tile_destination in board.get_all_valid_moves(tile_origin)]
+            tile_origin, tile_destination = random.choice(valid_moves) if valid_moves else (None, None)
+            nodes.append(0)
+        else:
+            tile_origin, tile_destination = player.get_move(board)
+            nodes.append(player.get_last_search_stats().nodes)
+        times.append(round(time.monotonic() - start, 6))
+
+        if tile_origin is None:
+            # The player has no move left
+            result = "no_move_player1" if player.is_player1() else "no_move_player2"
+            nodes.pop()
+            times.pop()
+            break
+
+        moves.append([tile_origin.index, tile_destination.index])
+        board.move_piece_to_tile(tile_origin, tile_destination)
+        current_player_index = (current_player_index + 1) % len(players)
+    else:
+        if board.has_game_ended():
+            result = "player1" if board.has_player1_won() else "player2"
+
+    for player in players:
+        player.close()
+
+    return create_record(first_player_index + 1, result, moves,
+                         game=game_index,
+                         time_per_move=times,
+                         nodes=nodes,
+                         ponder_hit_rate=[player.get_ponder_hit_rate() if isinstance(player, Player_Computer) else 0 for player in players],
+                         player1=player1_config,
+                         player2=player2_config)
+
+"""Plays all the games in a pool of processes and writes each record to the output as soon as its game finishes.
+Returns the number of games won by each player and the number of unfinished games"""
+def run_tournament(games: int, player1_config: dict, player2_config: dict, output_path: str, workers: int = None,
+                   max_moves: int = 300, random_opening_moves: int = 2, seed: int = 0) -> dict:
+    summary: dict = {"player1": 0, "player2": 0, "unfinished": 0}
+    with open(output_path, "a") as output, ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(play_game, i, player1_config, player2_config, max_moves, random_opening_moves, seed) for i in range(games)]
+        for future in as_completed(futures):
+            record: dict = future.result()
+            write_record(output, record)
+            output.flush()
+            summary[record["result"] if record["result"] in ["player1", "player2"] else "unfinished"] += 1
+    return summary
+
+"""Reads a player configuration: a JSON object with the same keys as DEFAULT_PLAYER_CONFIG"""
+def parse_player_config(text: str) -> dict:
+    config: dict = dict(DEFAULT_PLAYER_CONFIG)
+    config.update(json.loads(text))
+    return config
+
+# -----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays games between two computer players")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--player1", type=parse_player_config, default=dict(DEFAULT_PLAYER_CONFIG), help='JSON, for example \'{"eval_func": 1, "depth": 3, "heuristic": true}\'')
+    parser.add_argument("--player2", type=parse_player_config, default=dict(DEFAULT_PLAYER_CONFIG), help="JSON, like --player1")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--max-moves", type=int, default=300, help="Moves after which an unfinished game is stopped")
+    parser.add_argument("--random-opening-moves", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="tournament.jsonl")
+    args = parser.parse_args()
+
+    summary = run_tournament(args.games, args.player1, args.player2, args.output, args.workers, args.max_moves, args.random_opening_moves, args.seed)
+    print(f"Player1 won {summary['player1']}, Player2 won {summary['player2']}, {summary['unfinished']} unfinished")
@@ -0,0 +1,66 @@
+"""Stores the results of already searched positions, indexed by their Zobrist hash.
+The table has a fixed number of slots (calculated from its size in MB) and a replacement policy decides
+which entry stays in a slot when two positions collide.
+The scores depend on the player that searches, the evaluation function and the heuristic, so a table must not be shared between different searches"""
+class TranspositionTable():
+    # Type of bound of the stored score
+    EXACT: int = 0
+    LOWER_BOUND: int = 1
+    UPPER_BOUND: int = 2
+
+    # Replacement policies
+    ALWAYS_REPLACE: str = "always"
+    DEPTH_PREFERRED: str = "depth"
+    REPLACEMENT_POLICIES: list[str] = [ALWAYS_REPLACE, DEPTH_PREFERRED]
+
+    # Approximate memory used by each entry: the slot in the list, the tuple and the integers inside it
+    ENTRY_SIZE_BYTES: int = 176
+
+    def __init__(self, size_mb: float, replacement_policy: str = DEPTH_PREFERRED) -> None:
+        if replacement_policy not in TranspositionTable.REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {replacement_policy}")
+        self.replacement_policy: str = replacement_policy
+        self.number_of_slots: int = max(1, int(size_mb * 1024 * 1024) // TranspositionTable.ENTRY_SIZE_BYTES)
+
+        # Each slot is None or a tuple (key, depth, score, bound, origin index, destination index, generation)
+        self.slots: list = [None] * self.number_of_slots
+
+        # Incremented with every search, so the entries of older searches can always be replaced
+        self.generation: int = 0
+
+        self.probes: int = 0
+        self.hits: int = 0
+
+    """Marks the start of a new search"""
+    def new_search(self) -> None:
+        self.generation += 1
+
+    """Removes all the entries"""
+    def clear(self) -> None:
+        self.slots = [None] * self.number_of_slots
+        self.generation, self.probes, self.hits = 0, 0, 0
+
+    """Returns the entry stored for the key, or None if there is no entry for it"""
+    def probe(self, key: int):
+        self.probes += 1
+        entry = self.slots[key % self.number_of_slots]
+        if entry is not None  and  entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    """Stores the result of a search. The best move is stored as the indexes of the origin and destination tiles"""
+    def store(self, key: int, depth: int, score, bound: int, origin_index: int, destination_index: int) -> None:
+        slot_index: int = key % self.number_of_slots
+        entry = self.slots[slot_index]
+
+        if self.replacement_policy == TranspositionTable.DEPTH_PREFERRED  and  entry is not None:
+            # Keep the entry that was searched deeper, unless it belongs to an older search or it is the same position
+            if entry[0] != key  and  entry[6] == self.generation  and  entry[1] > depth:
+                return
+
+        self.slots[slot_index] = (key, depth, score, bound, origin_index, destination_index, self.generation)
+
+    """Returns the number of slots in use"""
+    def get_number_of_entries(self) -> int:
+        return sum(1 for entry in self.slots if entry is not None)
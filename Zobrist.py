@@ -0,0 +1,27 @@
+from random import Random
+
+NUMBER_OF_TILES: int = 121
+
+# The keys are generated with a fixed seed so the hash of a position is the same in every process and every run
+_random: Random = Random(0x5EED)
+
+"""Random 64 bits keys for each tile when it contains a piece of the player1 or of the player2"""
+PLAYER1_KEYS: tuple[int, ...] = tuple(_random.getrandbits(64) for _ in range(NUMBER_OF_TILES))
+PLAYER2_KEYS: tuple[int, ...] = tuple(_random.getrandbits(64) for _ in range(NUMBER_OF_TILES))
+
+"""Key added to the hash of a position when the player2 is the one who moves"""
+PLAYER2_TO_MOVE_KEY: int = _random.getrandbits(64)
+
+"""Returns the hash of the position where the bit i of each mask is set if the tile i contains a piece of that player"""
+def hash_masks(player1_mask: int, player2_mask: int) -> int:
+    res: int = 0
+    for i in range(NUMBER_OF_TILES):
+        if player1_mask >> i & 1:
+            res ^= PLAYER1_KEYS[i]
+        elif player2_mask >> i & 1:
+            res ^= PLAYER2_KEYS[i]
+    return res
+
+"""Returns the hash of the position including which player moves next"""
+def hash_with_turn(position_hash: int, is_player1_turn: bool) -> int:
+    return position_hash if is_player1_turn else position_hash ^ PLAYER2_TO_MOVE_KEY